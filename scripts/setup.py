@@ -9,8 +9,21 @@ APP = ['transcribe_gui.py']
 DATA_FILES = []
 OPTIONS = {
     'argv_emulation': True,
-    'packages': ['faster_whisper', 'tkinter', 'tqdm'],
-    'includes': ['tkinterdnd2'],
+    # faster_whisper stays a full package: it loads its Silero VAD model from
+    # faster_whisper/assets, which py2app only copies for packages
+    'packages': ['faster_whisper'],
+    'includes': [
+        'tkinterdnd2',
+        'tkinter.filedialog',
+        'tkinter.messagebox',
+        'tkinter.ttk',
+        'tqdm',
+    ],
+    # torch.testing is imported by torch itself, so it cannot be excluded
+    'excludes': ['tests', 'pytest', 'setuptools', 'numpy.testing'],
+    # Strip asserts only; -OO docstring stripping breaks libraries that
+    # build docstrings at import time (e.g. transformers)
+    'optimize': 1,
     'iconfile': 'AppIcon.icns',
     'plist': {
         'CFBundleName': 'Audio Transcriber',
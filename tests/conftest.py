@@ -4,28 +4,56 @@ Shared pytest fixtures for the transcription application test suite.
 This module provides common fixtures used across all test categories.
 """
 
+import os
 import pytest
-import tempfile
-import shutil
 import json
+from dataclasses import dataclass
 from pathlib import Path
+from types import MappingProxyType
+from typing import List, Optional
 from unittest.mock import Mock
 
 
+# Lightweight stand-ins for faster-whisper's result types. Plain dataclasses
+# mirror the real (mutable) Word/Segment shapes, so diarization code can still
+# attach a ``speaker`` attribute, without Mock's per-access bookkeeping.
+
+@dataclass
+class Word:
+    word: str
+    start: float
+    end: float
+
+
+@dataclass
+class Segment:
+    text: str
+    start: float
+    end: float
+    words: Optional[List[Word]] = None
+
+
+@dataclass
+class Info:
+    language: str
+    duration: float
+
+
 @pytest.fixture
-def temp_output_dir():
+def temp_output_dir(tmp_path):
     """
     Create a temporary output directory for tests.
 
-    Yields:
+    Args:
+        tmp_path: pytest built-in per-test temporary directory
+
+    Returns:
         Path: Path to temporary directory
 
     Cleanup:
-        Automatically removes directory after test completes
+        Handled by pytest, which keeps only the last few runs' directories
     """
-    temp_dir = tempfile.mkdtemp()
-    yield Path(temp_dir)
-    shutil.rmtree(temp_dir, ignore_errors=True)
+    return tmp_path
 
 
 @pytest.fixture
@@ -44,139 +72,156 @@ def sample_audio_path():
     return audio_file
 
 
-@pytest.fixture
-def mock_whisper_model(mocker):
+class FakeWhisperModel:
     """
-    Mock faster-whisper model to avoid actual model loading.
+    Handwritten WhisperModel stand-in exposing only ``transcribe``.
+
+    Only ``transcribe`` is a Mock, so stray attribute access raises
+    AttributeError instead of silently building child mocks.
+    """
+
+    def __init__(self):
+        segment = Segment("Hello world", 0.0, 1.5, words=[Word("Hello", 0.0, 0.5)])
+        info = Info(language="en", duration=5.0)
+
+        # Tuple of (segments, info), as returned by WhisperModel.transcribe
+        self.default_transcribe_result = ([segment], info)
+        self.transcribe = Mock(return_value=self.default_transcribe_result)
 
-    Args:
-        mocker: pytest-mock fixture
+
+@pytest.fixture(scope="session")
+def mock_whisper_model():
+    """
+    Fake faster-whisper model to avoid actual model loading.
+
+    Built once per session; ``reset_mocks`` restores the default
+    ``transcribe`` return value and clears call history before each test.
 
     Returns:
-        Mock: Mocked WhisperModel with transcribe method
+        FakeWhisperModel: Model whose transcribe() is a Mock
 
     Example:
         def test_transcription(mock_whisper_model):
             result = mock_whisper_model.transcribe("audio.mp3")
             # Returns mock segments
     """
-    mock_model = mocker.Mock()
-
-    # Mock transcribe method to return sample segments
-    mock_segment = Mock()
-    mock_segment.text = "Hello world"
-    mock_segment.start = 0.0
-    mock_segment.end = 1.5
+    return FakeWhisperModel()
 
-    mock_word = Mock()
-    mock_word.word = "Hello"
-    mock_word.start = 0.0
-    mock_word.end = 0.5
 
-    mock_segment.words = [mock_word]
-
-    # Return tuple of (segments, info)
-    mock_info = Mock()
-    mock_info.language = "en"
-    mock_info.duration = 5.0
+@pytest.fixture(autouse=True)
+def reset_mocks(request):
+    """
+    Reset the session-scoped Whisper fake before each test that uses it.
 
-    mock_model.transcribe.return_value = ([mock_segment], mock_info)
+    Args:
+        request: pytest fixture request object
 
-    return mock_model
+    Note:
+        Tests that don't request ``mock_whisper_model`` skip the reset entirely
+    """
+    if "mock_whisper_model" in request.fixturenames:
+        mock_model = request.getfixturevalue("mock_whisper_model")
+        mock_model.transcribe.reset_mock(return_value=True, side_effect=True)
+        mock_model.transcribe.return_value = mock_model.default_transcribe_result
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def default_config():
     """
     Default configuration dictionary for testing.
 
     Returns:
-        dict: Default configuration matching app defaults
+        MappingProxyType: Read-only default configuration matching app defaults
     """
-    return {
+    return MappingProxyType({
         "output_folder": "/tmp/test_output",
         "remember_folder": False,
         "cpu_threads": 4,
         "output_format": "with_timestamps"
-    }
+    })
 
 
-@pytest.fixture
-def sample_config_file(temp_output_dir, default_config):
+@pytest.fixture(scope="session")
+def config_dir(tmp_path_factory):
+    """
+    Session-wide directory holding the read-only config file fixtures.
+
+    Args:
+        tmp_path_factory: pytest session-scoped temporary directory factory
+
+    Returns:
+        Path: Path to config directory
+    """
+    return tmp_path_factory.mktemp("cfg")
+
+
+@pytest.fixture(scope="session")
+def sample_config_file(config_dir, default_config):
     """
     Create a temporary config file for testing.
 
+    The file is written once per session; tests must treat it as read-only.
+
     Args:
-        temp_output_dir: Temporary directory fixture
+        config_dir: Session config directory fixture
         default_config: Default config fixture
 
     Returns:
         Path: Path to temporary config file
     """
-    config_path = temp_output_dir / "test_config.json"
+    config_path = config_dir / "test_config.json"
     with open(config_path, 'w') as f:
-        json.dump(default_config, f)
+        json.dump(dict(default_config), f)
     return config_path
 
 
-@pytest.fixture
-def invalid_config_file(temp_output_dir):
+@pytest.fixture(scope="session")
+def invalid_config_file(config_dir):
     """
     Create an invalid/corrupted config file for error testing.
 
+    The file is written once per session; tests must treat it as read-only.
+
     Args:
-        temp_output_dir: Temporary directory fixture
+        config_dir: Session config directory fixture
 
     Returns:
         Path: Path to invalid config file
     """
-    config_path = temp_output_dir / "invalid_config.json"
+    config_path = config_dir / "invalid_config.json"
     with open(config_path, 'w') as f:
         f.write("{invalid json content")
     return config_path
 
 
-@pytest.fixture
+@pytest.fixture(scope="session")
 def sample_transcript_segments():
     """
     Sample transcript segments for testing output formatting.
 
     Returns:
-        list: List of mock segment objects
+        list: List of Segment objects
     """
-    segments = []
-
-    segment1 = Mock()
-    segment1.text = "Hello, how are you?"
-    segment1.start = 0.0
-    segment1.end = 2.0
-    segments.append(segment1)
+    return [
+        Segment("Hello, how are you?", 0.0, 2.0),
+        Segment("I'm doing well, thank you.", 2.5, 5.0),
+    ]
 
-    segment2 = Mock()
-    segment2.text = "I'm doing well, thank you."
-    segment2.start = 2.5
-    segment2.end = 5.0
-    segments.append(segment2)
-
-    return segments
 
+# Markers for skipping tests based on conditions
 
-@pytest.fixture(autouse=True)
-def reset_environment(monkeypatch):
+def pytest_addoption(parser):
     """
-    Reset environment variables for each test.
+    Register custom command line options.
 
     Args:
-        monkeypatch: pytest fixture for modifying environment
-
-    Note:
-        This fixture runs automatically before each test
+        parser: pytest argument parser
     """
-    # Set test-specific environment variables
-    monkeypatch.setenv("PYTEST_RUNNING", "1")
-
+    parser.addoption(
+        "--run-notimpl", action="store_true", default=False,
+        help="collect tests marked as not yet implemented"
+    )
 
-# Markers for skipping tests based on conditions
 
 def pytest_configure(config):
     """
@@ -185,12 +230,38 @@ def pytest_configure(config):
     Args:
         config: pytest configuration object
     """
+    # Set test-specific environment variables once for the whole session
+    os.environ["PYTEST_RUNNING"] = "1"
+
     config.addinivalue_line(
         "markers", "requires_audio: mark test as requiring audio test files"
     )
     config.addinivalue_line(
         "markers", "requires_models: mark test as requiring downloaded models"
     )
+    config.addinivalue_line(
+        "markers", "notimplemented: placeholder test, deselected unless --run-notimpl"
+    )
+    config.addinivalue_line(
+        "markers", "xdist_group(name): keep tests sharing a resource on one xdist worker"
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    """
+    Drop placeholder tests from collection so they cost no setup or teardown.
+
+    Args:
+        config: pytest configuration object
+        items: collected test items (modified in place)
+    """
+    if config.getoption("--run-notimpl"):
+        return
+
+    deselected = [item for item in items if "notimplemented" in item.keywords]
+    if deselected:
+        config.hook.pytest_deselected(items=deselected)
+        items[:] = [item for item in items if "notimplemented" not in item.keywords]
 
 
 @pytest.fixture
@@ -218,7 +289,8 @@ def skip_if_no_models():
         def test_with_models(skip_if_no_models):
             # Test will skip if models not downloaded
     """
-    # Check if models are cached
-    model_cache = Path.home() / ".cache/huggingface/hub"
+    # Check if models are cached, honouring the same env vars as huggingface_hub
+    hf_home = Path(os.environ.get("HF_HOME", Path.home() / ".cache/huggingface"))
+    model_cache = Path(os.environ.get("HUGGINGFACE_HUB_CACHE", hf_home / "hub"))
     if not model_cache.exists():
         pytest.skip("Models not downloaded")
@@ -0,0 +1,119 @@
+"""
+Fixtures shared by the unit test modules.
+"""
+
+import threading
+
+import pytest
+from unittest.mock import Mock
+
+import transcribe_gui
+
+
+# Tk variables wired onto bare_app, with the value each one's get() returns
+TK_VAR_DEFAULTS = {
+    "remember_folder": False,
+    "cpu_threads": 4,
+    "compute_type": "auto",
+    "batch_size": 8,
+    "quality": "Fast",
+    "output_format": "with_timestamps",
+    "enable_diarization": False,
+    "hf_token": "",
+    "num_speakers": 2,
+}
+
+
+@pytest.fixture(scope="module")
+def gui_patches():
+    """
+    Patch out Tk and drag-and-drop support once per test module.
+
+    Uses plain attribute swaps rather than ``unittest.mock.patch``; nothing
+    here needs call recording.
+
+    Yields:
+        pytest.MonkeyPatch: The module-wide monkeypatch
+    """
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr(transcribe_gui, "Tk", object)
+        mp.setattr(transcribe_gui, "HAS_DND", False)
+        yield mp
+
+
+@pytest.fixture(scope="module")
+def media_dir(tmp_path_factory):
+    """
+    Read-only directory of empty media files shared by a test module.
+
+    Contains ``test.mp3`` and ``LOUD.MP3`` (supported) and ``test.xyz``
+    (unsupported).
+
+    Args:
+        tmp_path_factory: pytest session-scoped temporary directory factory
+
+    Returns:
+        Path: Path to the media directory
+    """
+    media = tmp_path_factory.mktemp("media")
+    (media / "test.mp3").touch()
+    (media / "LOUD.MP3").touch()
+    (media / "test.xyz").touch()
+    return media
+
+
+@pytest.fixture
+def bare_app(gui_patches):
+    """
+    TranscriptionApp skeleton built without running ``__init__``.
+
+    Tk variables and widgets are Mocks preloaded with the app's default
+    values, so tests only set the attributes they care about.
+
+    Args:
+        gui_patches: Module-scoped Tk/HAS_DND patches
+
+    Returns:
+        TranscriptionApp: App instance with no real widgets
+    """
+    app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+
+    # Application state
+    app.output_folder = None
+    app.cpu_cores = 4
+    app.file_queue = {}
+    app.selected_file_index = None
+    app.is_processing = False
+    app.model = None
+    app._model_settings = None
+    app._parallel_workers = 1
+    app.model_lock = threading.Lock()
+    app._save_after = None
+    app._shown_percent = -1
+
+    # Tk variables (spec_set to get/set so typos fail instead of auto-creating)
+    for name, default in TK_VAR_DEFAULTS.items():
+        setattr(app, name, Mock(spec_set=('get', 'set'), **{"get.return_value": default}))
+    app.folder_var = Mock(spec_set=('get', 'set'))
+
+    # Widgets
+    app.start_button = Mock(spec_set=('config',))
+    app.remove_btn = Mock(spec_set=('config',))
+
+    return app
+
+
+@pytest.fixture(params=[True, False], ids=["processing", "idle"])
+def processing_state(request, bare_app):
+    """
+    bare_app with ``is_processing`` set to each of True and False.
+
+    Args:
+        request: pytest fixture request object carrying the param
+        bare_app: App skeleton fixture
+
+    Returns:
+        TranscriptionApp: The same bare_app instance
+    """
+    bare_app.is_processing = request.param
+    return bare_app
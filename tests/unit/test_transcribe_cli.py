@@ -4,20 +4,22 @@ Unit tests for transcribe_cli.py
 Tests core transcription functions including:
 - Simple transcription
 - WavLM diarization
+- pyannote diarization
 - Progress tracking
 - Output formatting
 """
 
+import re
+import numpy as np
 import pytest
-import json
-import sys
-from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock, call
+from contextlib import ExitStack, redirect_stdout
+from types import SimpleNamespace
+from unittest.mock import Mock, patch
 from io import StringIO
 
-# Import the module we're testing
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# Import the module we're testing (repo root is on pythonpath via pytest.ini)
 import transcribe_cli
+from tests.conftest import Info, Segment, Word
 
 
 # Mark all tests in this module as unit tests
@@ -27,6 +29,7 @@ pytestmark = pytest.mark.unit
 class TestTranscribeSimple:
     """Test suite for simple transcription without diarization."""
 
+    @pytest.mark.notimplemented
     def test_transcribe_simple_with_valid_audio(self, mock_whisper_model, temp_output_dir):
         """
         TC-CLI-001: Simple transcription with valid audio file
@@ -40,6 +43,7 @@ class TestTranscribeSimple:
         # 3. Assert segments are returned with correct structure
         pytest.skip("Test not yet implemented")
 
+    @pytest.mark.notimplemented
     def test_transcribe_simple_nonexistent_file(self):
         """
         TC-CLI-002: Handle non-existent file path
@@ -49,6 +53,7 @@ class TestTranscribeSimple:
         # TODO: Implement test
         pytest.skip("Test not yet implemented")
 
+    @pytest.mark.notimplemented
     def test_transcribe_simple_invalid_format(self):
         """
         TC-CLI-003: Handle invalid audio format
@@ -58,6 +63,7 @@ class TestTranscribeSimple:
         # TODO: Implement test
         pytest.skip("Test not yet implemented")
 
+    @pytest.mark.notimplemented
     def test_transcribe_simple_silent_audio(self):
         """
         TC-CLI-004: Handle empty/silent audio file
@@ -67,6 +73,7 @@ class TestTranscribeSimple:
         # TODO: Implement test
         pytest.skip("Test not yet implemented")
 
+    @pytest.mark.notimplemented
     def test_transcribe_different_model_sizes(self):
         """
         TC-CLI-005: Transcribe with different model sizes
@@ -76,6 +83,7 @@ class TestTranscribeSimple:
         # TODO: Implement test
         pytest.skip("Test not yet implemented")
 
+    @pytest.mark.notimplemented
     def test_language_auto_detection(self, mock_whisper_model):
         """
         TC-CLI-006: Language auto-detection
@@ -86,18 +94,52 @@ class TestTranscribeSimple:
         pytest.skip("Test not yet implemented")
 
 
+@pytest.fixture(scope="class")
+def wavlm_patches():
+    """
+    Patch the WavLM/torch dependency set once per test class.
+
+    The heavy modules are never imported: the ``_load_*_deps`` loaders are
+    stubbed out and the (lazily populated) module globals are replaced with mocks. numpy
+    is cheap to import, so the window/vote maths runs on the real thing.
+
+    Yields:
+        SimpleNamespace: The active mocks, keyed by dependency name
+    """
+    targets = {
+        'load_deps': 'transcribe_cli._load_wavlm_deps',
+        'load_torch': 'transcribe_cli._load_torch_deps',
+        'torch': 'transcribe_cli.torch',
+        'clustering': 'transcribe_cli.AgglomerativeClustering',
+        'extractor_class': 'transcribe_cli.Wav2Vec2FeatureExtractor',
+        'model_class': 'transcribe_cli.WavLMForXVector',
+    }
+    with ExitStack() as stack:
+        stack.enter_context(patch('transcribe_cli.np', np))
+        stack.callback(transcribe_cli._get_wavlm.cache_clear)
+        yield SimpleNamespace(**{
+            name: stack.enter_context(patch(target))
+            for name, target in targets.items()
+        })
+
+
 class TestTranscribeWithWavLM:
     """Test suite for WavLM speaker diarization."""
 
-    @patch('transcribe_cli.torchaudio')
-    @patch('transcribe_cli.WavLMForXVector')
-    @patch('transcribe_cli.Wav2Vec2FeatureExtractor')
-    @patch('transcribe_cli.AgglomerativeClustering')
-    @patch('transcribe_cli.np')
-    @patch('transcribe_cli.torch')
-    def test_diarization_two_speakers(self, mock_torch, mock_np, mock_clustering,
-                                     mock_extractor_class, mock_model_class,
-                                     mock_torchaudio, mock_whisper_model, temp_output_dir):
+    @pytest.fixture(autouse=True)
+    def decoded_audio(self, monkeypatch):
+        """
+        Stub audio decoding with 2s of 16 kHz mono silence.
+
+        Returns:
+            np.ndarray: The buffer handed to Whisper and WavLM
+        """
+        audio = np.zeros(32000, dtype=np.float32)
+        monkeypatch.setattr(transcribe_cli, 'decode_audio', Mock(return_value=audio))
+        return audio
+
+    def test_diarization_two_speakers(self, wavlm_patches, mock_whisper_model, temp_output_dir,
+                                      decoded_audio):
         """
         TC-CLI-007: Diarization with 2 speakers
 
@@ -107,67 +149,50 @@ class TestTranscribeWithWavLM:
         output_path = temp_output_dir / "diarized_output.txt"
         audio_path = "/fake/audio.mp3"
 
-        # Mock Whisper segments with words
-        word1 = Mock()
-        word1.word = "Hello"
-        word1.start = 0.0
-        word1.end = 0.5
-
-        word2 = Mock()
-        word2.word = "world"
-        word2.start = 1.0
-        word2.end = 1.5
-
-        segment = Mock()
-        segment.words = [word1, word2]
-        segment.text = "Hello world"
-
-        info = Mock()
-        info.language = "en"
-        info.duration = 2.0
+        # Whisper segments with words
+        segment = Segment("Hello world", 0.0, 1.5,
+                          words=[Word("Hello", 0.0, 0.5), Word("world", 1.0, 1.5)])
+        info = Info(language="en", duration=2.0)
 
         mock_whisper_model.transcribe.return_value = ([segment], info)
 
-        # Mock torchaudio
-        import numpy as np
-        mock_waveform = Mock()
-        mock_waveform.__getitem__ = Mock(return_value=Mock())
-        mock_torchaudio.load.return_value = (mock_waveform, 16000)
-
         # Mock WavLM models
-        mock_extractor = Mock()
-        mock_extractor_class.from_pretrained.return_value = mock_extractor
+        mock_extractor = Mock(return_value={})
+        wavlm_patches.extractor_class.from_pretrained.return_value = mock_extractor
 
+        transcribe_cli._get_wavlm.cache_clear()
         mock_model = Mock()
-        mock_embedding = Mock()
-        mock_embedding.cpu.return_value.numpy.return_value = np.random.rand(512)
-        mock_output = Mock()
-        mock_output.embeddings = mock_embedding
-        mock_model.return_value = mock_output
-        mock_model_class.from_pretrained.return_value = mock_model
-
-        # Mock clustering to return 2 speakers
-        mock_clustering_instance = Mock()
-        mock_clustering_instance.fit_predict.return_value = np.array([0, 1])  # 2 speakers
-        mock_clustering.return_value = mock_clustering_instance
+        mock_model.to.return_value.eval.return_value = mock_model
+        wavlm_patches.model_class.from_pretrained.return_value = mock_model
+        wavlm_patches.torch.cuda.is_available.return_value = False
+        wavlm_patches.torch.backends.mps.is_available.return_value = False
 
-        # Mock numpy
-        mock_np.array.return_value = np.array([[0.1], [0.2]])
+        # Mock torch: one batch of three (normalised) window embeddings
+        embeddings = np.eye(3)
+        wavlm_patches.torch.nn.functional.normalize.return_value.cpu.return_value.numpy.return_value = embeddings
 
-        # Mock torch
-        mock_torch.no_grad.return_value.__enter__ = Mock()
-        mock_torch.no_grad.return_value.__exit__ = Mock()
-        mock_torch.nn.functional.normalize.return_value = Mock()
+        # Mock clustering: "Hello" window is speaker 0, both "world" windows speaker 1
+        mock_clustering_instance = Mock()
+        mock_clustering_instance.fit_predict.return_value = np.array([0, 1, 1])
+        wavlm_patches.clustering.return_value = mock_clustering_instance
 
         # Act
         result = transcribe_cli.transcribe_with_wavlm(mock_whisper_model, audio_path, 2, str(output_path))
 
         # Assert
         assert result == str(output_path)
-        assert output_path.exists()
+        transcribe_cli.decode_audio.assert_called_once_with(audio_path, sampling_rate=16000)
+        assert mock_whisper_model.transcribe.call_args[0][0] is decoded_audio
+        mock_model.to.assert_called_once_with('cpu')
+        assert mock_model.call_count == 1  # all windows in a single forward pass
+        assert len(mock_extractor.call_args[0][0]) == 3
+        assert wavlm_patches.clustering.call_args[1]['metric'] == 'precomputed'
+        np.testing.assert_allclose(  # cosine distances between the embeddings
+            mock_clustering_instance.fit_predict.call_args[0][0], 1 - np.eye(3)
+        )
 
         content = output_path.read_text()
-        assert "SPEAKER_" in content or "Hello world" in content
+        assert "SPEAKER_00: Hello\n\nSPEAKER_01: world\n" in content
 
     def test_diarization_handles_no_words(self, mock_whisper_model, temp_output_dir):
         """
@@ -179,14 +204,9 @@ class TestTranscribeWithWavLM:
         output_path = temp_output_dir / "empty_output.txt"
         audio_path = "/fake/silent.mp3"
 
-        # Mock segment with no words
-        segment = Mock()
-        segment.words = []
-        segment.text = ""
-
-        info = Mock()
-        info.language = "en"
-        info.duration = 1.0
+        # Segment with no words
+        segment = Segment("", 0.0, 1.0, words=[])
+        info = Info(language="en", duration=1.0)
 
         mock_whisper_model.transcribe.return_value = ([segment], info)
 
@@ -197,11 +217,7 @@ class TestTranscribeWithWavLM:
         assert result == str(output_path)
         assert output_path.exists()
 
-    @patch('transcribe_cli.torchaudio')
-    @patch('transcribe_cli.WavLMForXVector')
-    @patch('transcribe_cli.Wav2Vec2FeatureExtractor')
-    def test_diarization_calls_whisper_with_word_timestamps(self, mock_extractor_class,
-                                                            mock_model_class, mock_torchaudio,
+    def test_diarization_calls_whisper_with_word_timestamps(self, wavlm_patches,
                                                             mock_whisper_model, temp_output_dir):
         """
         TC-CLI-009: Verify Whisper is called with word_timestamps=True
@@ -212,13 +228,8 @@ class TestTranscribeWithWavLM:
         output_path = temp_output_dir / "output.txt"
         audio_path = "/fake/audio.mp3"
 
-        segment = Mock()
-        segment.words = []
-        segment.text = "test"
-
-        info = Mock()
-        info.language = "en"
-        info.duration = 1.0
+        segment = Segment("test", 0.0, 1.0, words=[])
+        info = Info(language="en", duration=1.0)
 
         mock_whisper_model.transcribe.return_value = ([segment], info)
 
@@ -231,27 +242,73 @@ class TestTranscribeWithWavLM:
         assert call_kwargs['word_timestamps'] is True
         assert call_kwargs['vad_filter'] is True
 
+    def test_wavlm_models_loaded_once(self, wavlm_patches):
+        """
+        Verify the WavLM extractor and model are reused across files.
+        """
+        # Arrange
+        transcribe_cli._get_wavlm.cache_clear()
+        wavlm_patches.model_class.from_pretrained.reset_mock()
+
+        # Act
+        first = transcribe_cli._get_wavlm('cpu')
+        second = transcribe_cli._get_wavlm('cpu')
+
+        # Assert
+        assert first is second
+        wavlm_patches.model_class.from_pretrained.assert_called_once()
+
+    def test_sliding_windows_bucket_word_centers(self, wavlm_patches):
+        """
+        Verify each window covers exactly the words whose centre lies in it.
+        """
+        # Arrange
+        centers = np.array([0.25, 0.75, 1.25, 2.6])
+
+        # Act
+        windows = transcribe_cli._sliding_windows(centers, 3.0)
+
+        # Assert - the 1.5-2.5 window holds no word centre and is dropped
+        assert [(w['start'], w['end'], w['lo'], w['hi']) for w in windows] == [
+            (0.0, 1.0, 0, 2),
+            (0.5, 1.5, 1, 3),
+            (1.0, 2.0, 2, 3),
+            (2.0, 3.0, 3, 4),
+            (2.5, 3.0, 3, 4),
+        ]
+
+    def test_vote_word_speakers(self, wavlm_patches):
+        """
+        Verify majority voting, earliest-window tie breaks and uncovered words.
+        """
+        # Arrange
+        windows = [
+            {'lo': 0, 'hi': 2},
+            {'lo': 1, 'hi': 3},
+            {'lo': 2, 'hi': 3},
+        ]
+        speaker_ids = np.array([1, 0, 0])
+
+        # Act
+        votes = transcribe_cli._vote_word_speakers(4, windows, speaker_ids, 2)
+
+        # Assert - word 1 ties 1:1 and keeps the first window's speaker
+        assert votes.tolist() == [1, 1, 0, -1]
+
     def test_sliding_window_constants(self):
         """
         TC-CLI-010: Validate sliding window parameters
 
         Verify that WINDOW_SIZE and WINDOW_STRIDE create correct overlap.
         """
-        # This test verifies the constants are as expected
-        # The actual implementation uses WINDOW_SIZE=1.0 and WINDOW_STRIDE=0.5
-
-        # We can read the source to verify constants
-        import inspect
-        source = inspect.getsource(transcribe_cli.transcribe_with_wavlm)
+        from transcribe_cli import WINDOW_SIZE, WINDOW_STRIDE
 
-        assert "WINDOW_SIZE = 1.0" in source
-        assert "WINDOW_STRIDE = 0.5" in source
+        assert WINDOW_SIZE == 1.0
+        assert WINDOW_STRIDE == 0.5
 
         # Verify 50% overlap
         # If WINDOW_SIZE=1.0 and STRIDE=0.5, overlap = (1.0 - 0.5) / 1.0 = 0.5 = 50%
-        window_size = 1.0
-        stride = 0.5
-        overlap = (window_size - stride) / window_size
+        overlap = (WINDOW_SIZE - WINDOW_STRIDE) / WINDOW_SIZE
         assert overlap == 0.5, "Should have 50% overlap"
 
     def test_output_file_contains_metadata(self, mock_whisper_model, temp_output_dir):
@@ -264,13 +321,8 @@ class TestTranscribeWithWavLM:
         output_path = temp_output_dir / "metadata_test.txt"
         audio_path = "/fake/path/test_file.mp3"
 
-        segment = Mock()
-        segment.words = []
-        segment.text = "Test content"
-
-        info = Mock()
-        info.language = "en"
-        info.duration = 5.25
+        segment = Segment("Test content", 0.0, 5.25, words=[])
+        info = Info(language="en", duration=5.25)
 
         mock_whisper_model.transcribe.return_value = ([segment], info)
 
@@ -284,100 +336,134 @@ class TestTranscribeWithWavLM:
         assert "Duration: 5.25 seconds" in content
 
 
-class TestProgressPrint:
-    """Test suite for progress_print() function."""
-
-    def test_progress_print_valid(self, capsys):
-        """
-        TC-CLI-013: Print valid progress
+# Lines the SwiftUI bridge knows how to parse
+_PROTOCOL_RE = re.compile(r"PROGRESS:[01]\.\d{2}:.*|OUTPUT:.+")
 
-        Verify progress_print() outputs correct format.
-        """
-        # Act
-        transcribe_cli.progress_print(0.5, "Processing")
 
-        # Assert
-        captured = capsys.readouterr()
-        assert captured.out == "PROGRESS:0.50:Processing\n"
+class TestTranscribeWithPyannote:
+    """Test suite for pyannote speaker diarization."""
 
-    def test_progress_print_zero_progress(self, capsys):
+    @pytest.fixture(autouse=True)
+    def decoded_audio(self, monkeypatch):
         """
-        TC-CLI-014a: Progress at zero
+        Stub audio decoding with 2s of 16 kHz mono silence.
 
-        Verify that progress value 0.0 is handled correctly.
+        Returns:
+            np.ndarray: The buffer handed to Whisper and pyannote
         """
-        # Act
-        transcribe_cli.progress_print(0.0, "Starting")
+        audio = np.zeros(32000, dtype=np.float32)
+        monkeypatch.setattr(transcribe_cli, 'decode_audio', Mock(return_value=audio))
+        return audio
 
-        # Assert
-        captured = capsys.readouterr()
-        assert captured.out == "PROGRESS:0.00:Starting\n"
-
-    def test_progress_print_complete(self, capsys):
+    def test_diarization_assigns_turn_speakers(self, wavlm_patches, mock_whisper_model,
+                                               temp_output_dir, decoded_audio):
         """
-        TC-CLI-014b: Progress at completion
-
-        Verify that progress value 1.0 is handled correctly.
+        Verify each word takes the speaker of the pyannote turn it falls in.
         """
+        # Arrange
+        output_path = temp_output_dir / "pyannote_output.txt"
+        segment = Segment("Hello there world", 0.0, 2.0,
+                          words=[Word("Hello", 0.0, 0.4), Word("there", 0.5, 0.9),
+                                 Word("world", 1.2, 1.8)])
+        mock_whisper_model.transcribe.return_value = ([segment], Info(language="en", duration=2.0))
+
+        # Turns listed out of order; "there" sits in the gap, nearer SPEAKER_00
+        turns = [
+            (SimpleNamespace(start=1.1, end=2.0), "B", "SPEAKER_01"),
+            (SimpleNamespace(start=0.0, end=0.6), "A", "SPEAKER_00"),
+        ]
+        pipeline = Mock(return_value=SimpleNamespace(
+            speaker_diarization=SimpleNamespace(itertracks=lambda yield_label: turns)))
+
         # Act
-        transcribe_cli.progress_print(1.0, "Complete")
+        result = transcribe_cli.transcribe_with_pyannote(
+            mock_whisper_model, "/fake/audio.mp3", 2, str(output_path), pipeline
+        )
 
         # Assert
-        captured = capsys.readouterr()
-        assert captured.out == "PROGRESS:1.00:Complete\n"
+        assert result == str(output_path)
+        assert mock_whisper_model.transcribe.call_args[0][0] is decoded_audio
+        assert pipeline.call_args[1] == {'num_speakers': 2}
+        wavlm_patches.torch.from_numpy.assert_called_once()
+        assert "SPEAKER_00: Hello there\n\nSPEAKER_01: world\n" in output_path.read_text()
 
-    def test_progress_print_special_characters(self, capsys):
+    def test_diarization_without_turns_writes_segments(self, wavlm_patches, mock_whisper_model,
+                                                      temp_output_dir):
         """
-        TC-CLI-015: Special characters in message
-
-        Verify that special characters are included in progress messages.
+        Verify an empty diarization falls back to the plain segment text.
         """
+        # Arrange
+        output_path = temp_output_dir / "no_turns.txt"
+        segment = Segment("Hello", 0.0, 0.5, words=[Word("Hello", 0.0, 0.5)])
+        mock_whisper_model.transcribe.return_value = ([segment], Info(language="en", duration=1.0))
+        pipeline = Mock(return_value=SimpleNamespace(
+            speaker_diarization=SimpleNamespace(itertracks=lambda yield_label: [])))
+
         # Act
-        transcribe_cli.progress_print(0.75, "Processing file: test's.mp3")
+        transcribe_cli.transcribe_with_pyannote(
+            mock_whisper_model, "/fake/audio.mp3", 0, str(output_path), pipeline
+        )
 
-        # Assert
-        captured = capsys.readouterr()
-        assert "test's.mp3" in captured.out
-        assert "PROGRESS:0.75:" in captured.out
+        # Assert - 0 speakers lets pyannote pick the count
+        assert pipeline.call_args[1] == {'num_speakers': None}
+        assert output_path.read_text().endswith("Hello\n\n")
 
-    def test_progress_print_with_colons(self, capsys):
+    @pytest.mark.parametrize("turn_starts, turn_ends, centers, expected", [
+        ([0.0, 2.0, 5.0], [1.0, 3.0, 6.0], [-0.5, 0.5, 1.2, 1.9, 2.5, 4.2, 7.0], [0, 0, 0, 1, 1, 2, 2]),
+        # Turn 1 overlaps the start of turn 0: covered words take the
+        # earliest covering turn, not the latest one that already ended
+        ([0.0, 2.0, 11.0], [10.0, 3.0, 12.0], [2.5, 5.0, 10.4, 10.6], [0, 0, 0, 2]),
+    ], ids=["disjoint", "overlapping"])
+    def test_match_turns(self, wavlm_patches, turn_starts, turn_ends, centers, expected):
         """
-        TC-CLI-015b: Colons in message
-
-        Verify that colons in messages are handled (they're part of the format).
+        Verify word centres map to the containing or nearest turn.
         """
         # Act
-        transcribe_cli.progress_print(0.33, "Step 1:3 - Loading")
+        turns = transcribe_cli._match_turns(np.array(centers), np.array(turn_starts), np.array(turn_ends))
 
         # Assert
-        captured = capsys.readouterr()
-        assert "PROGRESS:0.33:Step 1:3 - Loading\n" == captured.out
+        assert turns.tolist() == expected
 
 
-class TestOutputPrint:
-    """Test suite for output_print() function."""
+def _capture(fn, *args, **kwargs):
+    """Run fn with stdout redirected in-process and return what it printed."""
+    buf = StringIO()
+    with redirect_stdout(buf):
+        fn(*args, **kwargs)
+    return buf.getvalue()
 
-    def test_output_print_valid_path(self, capsys):
+
+class TestProgressPrint:
+    """Test suite for progress_print() function."""
+
+    @pytest.mark.parametrize("value,message,expected", [
+        (0.5, "Processing", "PROGRESS:0.50:Processing\n"),             # TC-CLI-013
+        (0.0, "Starting", "PROGRESS:0.00:Starting\n"),                 # TC-CLI-014a
+        (1.0, "Complete", "PROGRESS:1.00:Complete\n"),                 # TC-CLI-014b
+        (0.75, "Processing file: test's.mp3",
+         "PROGRESS:0.75:Processing file: test's.mp3\n"),               # TC-CLI-015
+        (0.33, "Step 1:3 - Loading", "PROGRESS:0.33:Step 1:3 - Loading\n"),  # TC-CLI-015b
+    ], ids=["valid", "zero", "complete", "special_characters", "colons"])
+    def test_progress_print(self, value, message, expected):
         """
-        Verify output_print() outputs correct format with valid path.
+        Verify progress_print() outputs PROGRESS:value:message, with the
+        message passed through verbatim.
         """
-        # Act
-        transcribe_cli.output_print("/tmp/output.txt")
+        assert _capture(transcribe_cli.progress_print, value, message) == expected
 
-        # Assert
-        captured = capsys.readouterr()
-        assert captured.out == "OUTPUT:/tmp/output.txt\n"
 
-    def test_output_print_path_with_spaces(self, capsys):
+class TestOutputPrint:
+    """Test suite for output_print() function."""
+
+    @pytest.mark.parametrize("path", [
+        "/tmp/output.txt",
+        "/tmp/my folder/output.txt",
+    ], ids=["valid_path", "path_with_spaces"])
+    def test_output_print(self, path):
         """
-        Verify output_print() handles paths with spaces.
+        Verify output_print() outputs OUTPUT:path.
         """
-        # Act
-        transcribe_cli.output_print("/tmp/my folder/output.txt")
-
-        # Assert
-        captured = capsys.readouterr()
-        assert captured.out == "OUTPUT:/tmp/my folder/output.txt\n"
+        assert _capture(transcribe_cli.output_print, path) == f"OUTPUT:{path}\n"
 
 
 class TestTranscribeSimpleFunction:
@@ -394,11 +480,8 @@ class TestTranscribeSimpleFunction:
         audio_path = "/fake/path/test.mp3"
 
         # Mock the transcribe return value
-        mock_segment = Mock()
-        mock_segment.text = "Hello world"
-        mock_info = Mock()
-        mock_info.language = "en"
-        mock_info.duration = 5.0
+        mock_segment = Segment("Hello world", 0.0, 5.0)
+        mock_info = Info(language="en", duration=5.0)
 
         mock_whisper_model.transcribe.return_value = ([mock_segment], mock_info)
 
@@ -416,6 +499,29 @@ class TestTranscribeSimpleFunction:
         assert "Duration: 5.00 seconds" in content
         assert "Hello world" in content
 
+    def test_transcribe_simple_streams_segments(self, mock_whisper_model, temp_output_dir):
+        """
+        Verify the transcript is written while the Whisper generator is
+        consumed, not after collecting every segment.
+        """
+        # Arrange
+        output_path = temp_output_dir / "streamed.txt"
+        file_open_while_decoding = []
+
+        def decode():
+            yield Segment("First", 0.0, 1.0)
+            file_open_while_decoding.append(output_path.exists())
+            yield Segment("Second", 1.0, 2.0)
+
+        mock_whisper_model.transcribe.return_value = (decode(), Info(language="en", duration=2.0))
+
+        # Act
+        transcribe_cli.transcribe_simple(mock_whisper_model, "/fake/a.mp3", str(output_path))
+
+        # Assert
+        assert file_open_while_decoding == [True]
+        assert output_path.read_text().endswith("First\n\nSecond\n\n")
+
     def test_transcribe_simple_calls_model_with_correct_params(self, mock_whisper_model, temp_output_dir):
         """
         TC-CLI-002: Verify transcribe_simple() calls Whisper model correctly
@@ -426,11 +532,8 @@ class TestTranscribeSimpleFunction:
         output_path = temp_output_dir / "output.txt"
         audio_path = "/test/audio.mp3"
 
-        mock_segment = Mock()
-        mock_segment.text = "Test"
-        mock_info = Mock()
-        mock_info.language = "en"
-        mock_info.duration = 1.0
+        mock_segment = Segment("Test", 0.0, 1.0)
+        mock_info = Info(language="en", duration=1.0)
 
         mock_whisper_model.transcribe.return_value = ([mock_segment], mock_info)
 
@@ -443,11 +546,28 @@ class TestTranscribeSimpleFunction:
         assert call_args[0][0] == audio_path  # First positional arg
         assert call_args[1]['language'] is None  # Auto-detect
         assert call_args[1]['vad_filter'] is True
+        assert call_args[1]['beam_size'] == 1  # Greedy by default
+        assert call_args[1]['vad_parameters'] == {'min_silence_duration_ms': 250,
+                                                  'speech_pad_ms': 200}
 
 
 class TestCliMain:
     """Test suite for main() CLI function."""
 
+    @pytest.fixture(autouse=True)
+    def clear_model_cache(self):
+        """Drop models memoized by earlier tests so each sees its own WhisperModel mock."""
+        transcribe_cli._get_model.cache_clear()
+        yield
+        transcribe_cli._get_model.cache_clear()
+        transcribe_cli._get_pyannote.cache_clear()
+
+    @pytest.fixture(autouse=True)
+    def cpu_host(self, monkeypatch):
+        """Pretend to run on an 8-core machine without CUDA."""
+        monkeypatch.setattr(transcribe_cli.ctranslate2, 'get_cuda_device_count', lambda: 0)
+        monkeypatch.setattr(transcribe_cli.os, 'cpu_count', lambda: 8)
+
     @patch('transcribe_cli.WhisperModel')
     @patch('transcribe_cli.transcribe_simple')
     def test_main_simple_transcription(self, mock_transcribe_simple, mock_whisper_class, temp_output_dir):
@@ -457,7 +577,6 @@ class TestCliMain:
         Verify main() processes JSON request for simple transcription.
         """
         # Arrange
-        json_file = temp_output_dir / "request.json"
         audio_file = temp_output_dir / "test.mp3"
         audio_file.touch()
 
@@ -467,21 +586,21 @@ class TestCliMain:
             "outputPath": str(temp_output_dir),
             "enableDiarization": False
         }
-        json_file.write_text(json.dumps(request_data))
 
         mock_model = Mock()
         mock_whisper_class.return_value = mock_model
         mock_transcribe_simple.return_value = str(temp_output_dir / "test.txt")
 
         # Act
-        with patch('sys.argv', ['transcribe_cli.py', '--json', str(json_file)]):
-            transcribe_cli.main()
+        transcribe_cli.main(config=request_data)
 
         # Assert
-        mock_whisper_class.assert_called_once_with("tiny", device="auto", compute_type="auto")
+        mock_whisper_class.assert_called_once_with("tiny", device="cpu", compute_type="int8",
+                                                   cpu_threads=4, num_workers=1)
         mock_transcribe_simple.assert_called_once()
         call_args = mock_transcribe_simple.call_args[0]
-        assert call_args[0] == mock_model
+        assert isinstance(call_args[0], transcribe_cli.BatchedInferencePipeline)
+        assert call_args[0].model == mock_model
         assert call_args[1] == str(audio_file)
 
     @patch('transcribe_cli.WhisperModel')
@@ -493,7 +612,6 @@ class TestCliMain:
         Verify main() processes JSON request with diarization enabled.
         """
         # Arrange
-        json_file = temp_output_dir / "request.json"
         audio_file = temp_output_dir / "test.mp3"
         audio_file.touch()
 
@@ -505,24 +623,56 @@ class TestCliMain:
             "diarizationMethod": "wavlm",
             "numSpeakers": 3
         }
-        json_file.write_text(json.dumps(request_data))
 
         mock_model = Mock()
         mock_whisper_class.return_value = mock_model
         mock_diarize.return_value = str(temp_output_dir / "test.txt")
 
         # Act
-        with patch('sys.argv', ['transcribe_cli.py', '--json', str(json_file)]):
-            with patch('transcribe_cli.HAS_WAVLM', True):
-                transcribe_cli.main()
+        with patch('transcribe_cli.HAS_WAVLM', True):
+            transcribe_cli.main(config=request_data)
 
         # Assert
         mock_diarize.assert_called_once()
         call_args = mock_diarize.call_args[0]
-        assert call_args[0] == mock_model
+        assert call_args[0].model == mock_model
         assert call_args[1] == str(audio_file)
         assert call_args[2] == 3  # num_speakers
 
+    @patch('transcribe_cli.WhisperModel')
+    @patch('transcribe_cli.transcribe_with_wavlm')
+    @patch('transcribe_cli.transcribe_with_pyannote')
+    @patch('transcribe_cli.Pipeline')
+    def test_main_with_pyannote_diarization(self, mock_pipeline_class, mock_pyannote, mock_wavlm,
+                                            mock_whisper_class, wavlm_patches, temp_output_dir):
+        """
+        Verify 'auto' loads the pyannote pipeline once and uses it for every file.
+        """
+        # Arrange
+        audio_files = [str(temp_output_dir / "a.mp3"), str(temp_output_dir / "b.mp3")]
+        request_data = {
+            "audioFiles": audio_files,
+            "outputPath": str(temp_output_dir),
+            "enableDiarization": True,
+            "diarizationMethod": "auto",
+            "hfToken": "hf_test",
+        }
+        pipeline = mock_pipeline_class.from_pretrained.return_value
+        wavlm_patches.torch.cuda.is_available.return_value = False
+        wavlm_patches.torch.backends.mps.is_available.return_value = False
+
+        # Act
+        with patch('transcribe_cli.HAS_PYANNOTE', True), patch('transcribe_cli.HAS_WAVLM', True):
+            transcribe_cli.main(config=request_data)
+
+        # Assert
+        mock_pipeline_class.from_pretrained.assert_called_once_with(
+            'pyannote/speaker-diarization-3.1', token="hf_test"
+        )
+        assert [c[0][1] for c in mock_pyannote.call_args_list] == audio_files
+        assert all(c[0][4] is pipeline for c in mock_pyannote.call_args_list)
+        mock_wavlm.assert_not_called()
+
     @patch('transcribe_cli.WhisperModel')
     def test_main_multiple_files(self, mock_whisper_class, temp_output_dir):
         """
@@ -531,7 +681,6 @@ class TestCliMain:
         Verify main() processes all files in batch.
         """
         # Arrange
-        json_file = temp_output_dir / "request.json"
         audio1 = temp_output_dir / "test1.mp3"
         audio2 = temp_output_dir / "test2.mp3"
         audio1.touch()
@@ -542,7 +691,6 @@ class TestCliMain:
             "modelSize": "tiny",
             "outputPath": str(temp_output_dir)
         }
-        json_file.write_text(json.dumps(request_data))
 
         mock_model = Mock()
         mock_whisper_class.return_value = mock_model
@@ -551,11 +699,150 @@ class TestCliMain:
             mock_simple.return_value = "output.txt"
 
             # Act
-            with patch('sys.argv', ['transcribe_cli.py', '--json', str(json_file)]):
-                transcribe_cli.main()
+            transcribe_cli.main(config=request_data)
 
-            # Assert - transcribe_simple called twice
+            # Assert - each file gets its own batched pipeline over the one model
             assert mock_simple.call_count == 2
+            first, second = (c[0][0] for c in mock_simple.call_args_list)
+            assert first is not second
+            assert first.model is mock_model and second.model is mock_model
+
+    @patch('transcribe_cli.WhisperModel')
+    @patch('transcribe_cli.transcribe_simple')
+    def test_main_reuses_loaded_model(self, mock_simple, mock_whisper_class, temp_output_dir):
+        """
+        Verify repeated main() calls in one process load the model only once.
+        """
+        # Arrange
+        request_data = {
+            "audioFiles": [str(temp_output_dir / "test.mp3")],
+            "modelSize": "tiny",
+            "outputPath": str(temp_output_dir)
+        }
+        mock_simple.return_value = "output.txt"
+
+        # Act
+        transcribe_cli.main(config=request_data)
+        transcribe_cli.main(config=request_data)
+
+        # Assert
+        mock_whisper_class.assert_called_once_with("tiny", device="cpu", compute_type="int8",
+                                                   cpu_threads=4, num_workers=1)
+        assert mock_simple.call_count == 2
+
+    @pytest.mark.parametrize("cuda_devices, override, expected", [
+        (0, None, ("cpu", "int8")),
+        (1, None, ("cuda", "int8_float16")),
+        (1, "float16", ("cuda", "float16")),
+    ], ids=["cpu", "cuda", "override"])
+    @patch('transcribe_cli.WhisperModel')
+    @patch('transcribe_cli.transcribe_simple')
+    def test_main_picks_compute_type(self, mock_simple, mock_whisper_class, monkeypatch,
+                                     temp_output_dir, cuda_devices, override, expected):
+        """
+        Verify int8 quantization per device, and the computeType override.
+        """
+        # Arrange
+        monkeypatch.setattr(transcribe_cli.ctranslate2, 'get_cuda_device_count',
+                            lambda: cuda_devices)
+        request_data = {
+            "audioFiles": [str(temp_output_dir / "test.mp3")],
+            "outputPath": str(temp_output_dir),
+            "computeType": override,
+        }
+
+        # Act
+        transcribe_cli.main(config=request_data)
+
+        # Assert
+        device, compute_type = expected
+        mock_whisper_class.assert_called_once_with("medium", device=device,
+                                                   compute_type=compute_type, cpu_threads=4,
+                                                   num_workers=1)
+
+    @patch('transcribe_cli.WhisperModel')
+    def test_main_emits_only_protocol_lines(self, mock_whisper_class, mock_whisper_model,
+                                            temp_output_dir):
+        """
+        Verify every stdout line of a full run is a PROGRESS or OUTPUT line.
+        """
+        # Arrange
+        request_data = {
+            "audioFiles": ["/fake/a.mp3", "/fake/b.mp3"],
+            "modelSize": "tiny",
+            "outputPath": str(temp_output_dir)
+        }
+
+        # Act
+        with patch('transcribe_cli.BatchedInferencePipeline', return_value=mock_whisper_model):
+            printed = _capture(transcribe_cli.main, config=request_data)
+
+        # Assert
+        lines = printed.splitlines()
+        assert [line for line in lines if not _PROTOCOL_RE.fullmatch(line)] == []
+        assert sum(line.startswith("OUTPUT:") for line in lines) == 2
+
+    @patch('transcribe_cli.WhisperModel')
+    def test_main_parallel_files(self, mock_whisper_class, temp_output_dir, capsys):
+        """
+        Verify parallelFiles shares one model across workers and tags progress by file.
+        """
+        # Arrange
+        audio_files = [str(temp_output_dir / f"test{i}.mp3") for i in range(3)]
+        request_data = {
+            "audioFiles": audio_files,
+            "modelSize": "tiny",
+            "outputPath": str(temp_output_dir),
+            "parallelFiles": 2,
+        }
+
+        pipelines = []
+
+        def fake_simple(model, audio_path, output_path, **kwargs):
+            pipelines.append(model)
+            transcribe_cli.progress_print(0.5, "Transcribing")
+            return output_path
+
+        # Act
+        with patch('transcribe_cli.transcribe_simple', side_effect=fake_simple):
+            transcribe_cli.main(config=request_data)
+
+        # Assert
+        mock_whisper_class.assert_called_once_with("tiny", device="cpu", compute_type="int8",
+                                                   cpu_threads=2, num_workers=2)
+        assert len({id(pipeline) for pipeline in pipelines}) == 3
+        assert all(pipeline.model is mock_whisper_class.return_value for pipeline in pipelines)
+        lines = capsys.readouterr().out.splitlines()
+        assert sorted(line for line in lines if line.startswith("OUTPUT:")) == [
+            f"OUTPUT:{temp_output_dir / f'test{i}.txt'}" for i in range(3)
+        ]
+        assert sorted(line for line in lines if "] Transcribing" in line) == [
+            f"PROGRESS:0.50:[{i}/3] Transcribing" for i in range(1, 4)
+        ]
+        assert lines[-2:] == ["PROGRESS:1.00:Finished 3/3 files",
+                              "PROGRESS:1.00:All files complete (3 files)"]
+
+    @patch('transcribe_cli.WhisperModel')
+    @patch('transcribe_cli.transcribe_simple')
+    def test_main_passes_beam_size(self, mock_simple, mock_whisper_class, temp_output_dir):
+        """
+        Verify explicit beamSize and vadMinSilenceMs in the request reach the transcriber.
+        """
+        # Arrange
+        request_data = {
+            "audioFiles": ["/fake/a.mp3"],
+            "outputPath": str(temp_output_dir),
+            "beamSize": 5,
+            "vadMinSilenceMs": 500
+        }
+        mock_simple.return_value = "output.txt"
+
+        # Act
+        transcribe_cli.main(config=request_data)
+
+        # Assert
+        assert mock_simple.call_args[1]['beam_size'] == 5
+        assert mock_simple.call_args[1]['vad_min_silence_ms'] == 500
 
     def test_main_no_json_argument(self, capsys):
         """
@@ -564,11 +851,10 @@ class TestCliMain:
         Verify main() exits with error when --json is missing.
         """
         # Act & Assert
-        with patch('sys.argv', ['transcribe_cli.py']):
-            with pytest.raises(SystemExit) as exc_info:
-                transcribe_cli.main()
+        with pytest.raises(SystemExit) as exc_info:
+            transcribe_cli.main(argv=[])
 
-            assert exc_info.value.code == 1
+        assert exc_info.value.code == 1
 
         captured = capsys.readouterr()
         assert "Error: --json argument required" in captured.err
@@ -584,35 +870,54 @@ class TestCliMain:
         json_file.write_text("{invalid json content")
 
         # Act & Assert
-        with patch('sys.argv', ['transcribe_cli.py', '--json', str(json_file)]):
-            with pytest.raises(SystemExit) as exc_info:
-                transcribe_cli.main()
+        with pytest.raises(SystemExit) as exc_info:
+            transcribe_cli.main(argv=['--json', str(json_file)])
 
-            assert exc_info.value.code == 1
+        assert exc_info.value.code == 1
 
         captured = capsys.readouterr()
         assert "Error reading JSON" in captured.err
 
-    def test_main_no_audio_files(self, temp_output_dir, capsys):
+    @patch('transcribe_cli.WhisperModel')
+    @patch('transcribe_cli.transcribe_simple')
+    def test_main_reads_json_file(self, mock_simple, mock_whisper_class, temp_output_dir):
+        """
+        Verify main() parses a request file passed via --json.
+        """
+        # Arrange
+        json_file = temp_output_dir / "request.json"
+        json_file.write_text(
+            '{"audioFiles": ["/tmp/caf\u00e9.mp3"], "modelSize": "tiny", '
+            f'"outputPath": "{temp_output_dir}"}}',
+            encoding='utf-8'
+        )
+        mock_simple.return_value = "output.txt"
+
+        # Act
+        transcribe_cli.main(argv=['--json', str(json_file)])
+
+        # Assert
+        mock_whisper_class.assert_called_once_with("tiny", device="cpu", compute_type="int8",
+                                                   cpu_threads=4, num_workers=1)
+        assert mock_simple.call_args[0][1] == "/tmp/caf\u00e9.mp3"
+
+    def test_main_no_audio_files(self, capsys):
         """
         TC-CLI-021: CLI main() with empty audioFiles list
 
         Verify main() exits when no audio files are specified.
         """
         # Arrange
-        json_file = temp_output_dir / "request.json"
         request_data = {
             "audioFiles": [],
             "modelSize": "tiny"
         }
-        json_file.write_text(json.dumps(request_data))
 
         # Act & Assert
-        with patch('sys.argv', ['transcribe_cli.py', '--json', str(json_file)]):
-            with pytest.raises(SystemExit) as exc_info:
-                transcribe_cli.main()
+        with pytest.raises(SystemExit) as exc_info:
+            transcribe_cli.main(config=request_data)
 
-            assert exc_info.value.code == 1
+        assert exc_info.value.code == 1
 
         captured = capsys.readouterr()
         assert "No audio files specified" in captured.err
@@ -626,7 +931,6 @@ class TestCliMain:
         Verify main() continues processing when one file fails.
         """
         # Arrange
-        json_file = temp_output_dir / "request.json"
         audio1 = temp_output_dir / "test1.mp3"
         audio2 = temp_output_dir / "test2.mp3"
         audio1.touch()
@@ -637,7 +941,6 @@ class TestCliMain:
             "modelSize": "tiny",
             "outputPath": str(temp_output_dir)
         }
-        json_file.write_text(json.dumps(request_data))
 
         mock_model = Mock()
         mock_whisper_class.return_value = mock_model
@@ -649,8 +952,7 @@ class TestCliMain:
         ]
 
         # Act
-        with patch('sys.argv', ['transcribe_cli.py', '--json', str(json_file)]):
-            transcribe_cli.main()
+        transcribe_cli.main(config=request_data)
 
         # Assert - both files attempted despite first failure
         assert mock_simple.call_count == 2
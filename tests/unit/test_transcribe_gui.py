@@ -6,17 +6,19 @@ Tests GUI application business logic including:
 - File queue operations
 - Input validation
 - Timestamp formatting
+- Model reuse
 """
 
 import pytest
 import json
-import sys
+import threading
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from types import SimpleNamespace
+from unittest.mock import Mock, call
 
-# Import the module we're testing
-sys.path.insert(0, str(Path(__file__).parent.parent.parent))
+# Import the module we're testing (repo root is on pythonpath via pytest.ini)
 import transcribe_gui
+from tests.unit.conftest import TK_VAR_DEFAULTS
 
 
 # Mark all tests in this module as unit tests
@@ -26,84 +28,55 @@ pytestmark = pytest.mark.unit
 class TestConfigurationManagement:
     """Test suite for config loading and saving."""
 
-    @patch('transcribe_gui.CONFIG_FILE')
-    @patch('transcribe_gui.Tk')
-    def test_load_valid_config(self, mock_tk, mock_config_file_path,
-                              sample_config_file, default_config):
+    def test_load_valid_config(self, bare_app, sample_config_file, monkeypatch):
         """
         TC-GUI-005: Load valid config file
 
         Verify that a valid config file is loaded correctly.
         """
         # Arrange
-        mock_config_file_path.__truediv__ = Mock(return_value=sample_config_file)
-        mock_config_file_path.exists.return_value = True
-
-        # Create minimal app instance
-        with patch('transcribe_gui.HAS_DND', False):
-            with patch('transcribe_gui.multiprocessing.cpu_count', return_value=4):
-                app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-
-                # Initialize minimal required attributes
-                app.output_folder = None
-                app.cpu_cores = 4  # Add cpu_cores attribute
-                app.remember_folder = Mock()
-                app.remember_folder.set = Mock()
-                app.remember_folder.get = Mock(return_value=False)
-                app.cpu_threads = Mock()
-                app.cpu_threads.set = Mock()
-                app.cpu_threads.get = Mock(return_value=4)
-                app.output_format = Mock()
-                app.output_format.set = Mock()
-                app.enable_diarization = Mock()
-                app.enable_diarization.set = Mock()
-                app.hf_token = Mock()
-                app.hf_token.set = Mock()
-                app.num_speakers = Mock()
-                app.num_speakers.set = Mock()
-
-        # Mock CONFIG_FILE to point to our test file
-        with patch('transcribe_gui.CONFIG_FILE', sample_config_file):
-            # Act
-            app.load_config()
-
-            # Assert - verify set methods were called with config values
-            app.remember_folder.set.assert_called()
-            app.cpu_threads.set.assert_called()
-
-    @patch('transcribe_gui.CONFIG_FILE')
-    @patch('transcribe_gui.Tk')
-    def test_load_corrupted_config(self, mock_tk, mock_config_file_path, invalid_config_file):
+        app = bare_app
+
+        # Point CONFIG_FILE at our test file
+        monkeypatch.setattr(transcribe_gui, "CONFIG_FILE", sample_config_file)
+
+        # Act
+        app.load_config()
+
+        # Assert - every Tk variable was set from the file (or its default)
+        expected = {
+            "remember_folder": call(False),
+            "cpu_threads": call(4),
+            "compute_type": call("auto"),
+            "batch_size": call(8),
+            "quality": call("Fast"),
+            "output_format": call("with_timestamps"),
+            "enable_diarization": call(False),
+            "hf_token": call(""),
+            "num_speakers": call(0),
+        }
+        assert {name: getattr(app, name).set.call_args for name in TK_VAR_DEFAULTS} == expected
+        assert app.output_folder == "/tmp/test_output"
+
+    def test_load_corrupted_config(self, bare_app, invalid_config_file, monkeypatch):
         """
         TC-GUI-006: Load corrupted config
 
         Verify that corrupted config falls back to defaults with warning.
         """
         # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            with patch('transcribe_gui.multiprocessing.cpu_count', return_value=4):
-                app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-
-                # Initialize minimal required attributes
-                app.output_folder = None
-                app.cpu_cores = 4  # Add cpu_cores attribute
-                app.remember_folder = Mock()
-                app.cpu_threads = Mock()
-                app.output_format = Mock()
-                app.enable_diarization = Mock()
-                app.hf_token = Mock()
-                app.num_speakers = Mock()
-
-        # Mock CONFIG_FILE to point to invalid file
-        with patch('transcribe_gui.CONFIG_FILE', invalid_config_file):
-            # Act - should not crash
-            app.load_config()
-
-            # Assert - app should still have default state (no crash)
-            assert app.output_folder is None  # Should remain None (not set from corrupt file)
-
-    @patch('transcribe_gui.Tk')
-    def test_save_config_to_disk(self, mock_tk, temp_output_dir):
+        app = bare_app
+
+        # Point CONFIG_FILE at invalid file
+        monkeypatch.setattr(transcribe_gui, "CONFIG_FILE", invalid_config_file)
+
+        # Act - should not crash
+        app.load_config()
+
+        # Assert - app should still have default state (no crash)
+        assert app.output_folder is None  # Should remain None (not set from corrupt file)
+
+    def test_save_config_to_disk(self, bare_app, temp_output_dir, monkeypatch):
         """
         TC-GUI-007: Save config to disk
 
@@ -112,161 +85,185 @@ class TestConfigurationManagement:
         # Arrange
         config_path = temp_output_dir / "test_config.json"
 
-        with patch('transcribe_gui.HAS_DND', False):
-            with patch('transcribe_gui.multiprocessing.cpu_count', return_value=4):
-                app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-
-                # Set up config values
-                app.output_folder = "/tmp/output"
-                app.remember_folder = Mock()
-                app.remember_folder.get = Mock(return_value=True)
-                app.cpu_threads = Mock()
-                app.cpu_threads.get = Mock(return_value=8)
-                app.output_format = Mock()
-                app.output_format.get = Mock(return_value="with_timestamps")
-                app.enable_diarization = Mock()
-                app.enable_diarization.get = Mock(return_value=False)
-                app.hf_token = Mock()
-                app.hf_token.get = Mock(return_value="")
-                app.num_speakers = Mock()
-                app.num_speakers.get = Mock(return_value=2)
-
-        # Mock CONFIG_FILE to point to our test path
-        with patch('transcribe_gui.CONFIG_FILE', config_path):
-            # Act
-            app.save_config()
-
-            # Assert
-            assert config_path.exists()
-
-            # Verify JSON content
-            content = json.loads(config_path.read_text())
-            assert content['output_folder'] == "/tmp/output"
-            assert content['remember_folder'] is True
-            assert content['cpu_threads'] == 8
-            assert content['num_speakers'] == 2
+        app = bare_app
+        app.output_folder = "/tmp/output"
+        app.remember_folder.get.return_value = True
+        app.cpu_threads.get.return_value = 8
+
+        # Point CONFIG_FILE at our test path
+        monkeypatch.setattr(transcribe_gui, "CONFIG_FILE", config_path)
+
+        # Act
+        app._save_config_now()
+
+        # Assert
+        assert config_path.exists()
+        assert not config_path.with_suffix('.tmp').exists()
+
+        # Verify JSON content
+        assert json.loads(config_path.read_text()) == {
+            "output_folder": "/tmp/output",
+            "remember_folder": True,
+            "cpu_threads": 8,
+            "compute_type": "auto",
+            "batch_size": 8,
+            "quality": "Fast",
+            "output_format": "with_timestamps",
+            "enable_diarization": False,
+            "hf_token": "",
+            "num_speakers": 2,
+        }
+
+    def test_save_config_debounced(self, bare_app, monkeypatch):
+        """
+        Verify rapid changes reschedule a single pending write.
+        """
+        # Arrange
+        bare_app.root = Mock(spec_set=('after', 'after_cancel'))
+        bare_app.root.after.side_effect = ["after#1", "after#2"]
+        write = Mock()
+        monkeypatch.setattr(bare_app, "_save_config_now", write)
+
+        # Act
+        bare_app.save_config()
+        bare_app.save_config()
+
+        # Assert - the first write was cancelled, nothing written yet
+        bare_app.root.after_cancel.assert_called_once_with("after#1")
+        assert bare_app.root.after.call_args == call(transcribe_gui.CONFIG_SAVE_DELAY_MS, write)
+        assert bare_app._save_after == "after#2"
+        write.assert_not_called()
+
+    def test_close_flushes_pending_save(self, bare_app, monkeypatch):
+        """
+        Verify closing the window writes a still-pending config change.
+        """
+        # Arrange
+        bare_app.root = Mock(spec_set=('after_cancel', 'destroy'))
+        bare_app._save_after = "after#1"
+        write = Mock()
+        monkeypatch.setattr(bare_app, "_save_config_now", write)
+
+        # Act
+        bare_app.on_close()
+
+        # Assert
+        bare_app.root.after_cancel.assert_called_once_with("after#1")
+        write.assert_called_once()
+        bare_app.root.destroy.assert_called_once()
 
 
 class TestFileQueueOperations:
     """Test suite for file queue management."""
 
-    @patch('transcribe_gui.Tk')
-    def test_add_file_to_queue(self, mock_tk, temp_output_dir):
+    @pytest.fixture
+    def app(self, bare_app):
+        """bare_app with the file list drawing and start button stubbed out."""
+        bare_app._append_to_list = Mock()
+        bare_app._remove_from_list = Mock()
+        bare_app.update_start_button = Mock()
+        return bare_app
+
+    def test_add_file_to_queue(self, app, media_dir):
         """
         TC-GUI-008: Add file to queue
 
         Verify that a file can be added to the processing queue.
         """
         # Arrange
-        test_audio = temp_output_dir / "test.mp3"
-        test_audio.touch()  # Create the file
-
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = []
-            app.update_file_list = Mock()
-            app.update_start_button = Mock()
+        test_audio = media_dir / "test.mp3"
 
         # Act
         app.add_files_to_queue([str(test_audio)])
 
         # Assert
-        assert len(app.file_queue) == 1
-        assert app.file_queue[0] == test_audio
-        app.update_file_list.assert_called_once()
+        assert list(app.file_queue.values()) == [test_audio]
+        app._append_to_list.assert_called_once_with([(str(test_audio.resolve()), test_audio)])
         app.update_start_button.assert_called_once()
 
-    @patch('transcribe_gui.Tk')
-    def test_add_duplicate_file_to_queue(self, mock_tk, temp_output_dir):
+    def test_add_uppercase_extension_to_queue(self, app, media_dir):
         """
-        TC-GUI-008b: Adding duplicate file to queue
-
-        Verify that duplicate files are not added twice.
+        Verify that extensions are matched case-insensitively.
         """
         # Arrange
-        test_audio = temp_output_dir / "test.mp3"
-        test_audio.touch()
-
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = [test_audio]  # Already in queue
-            app.update_file_list = Mock()
-            app.update_start_button = Mock()
+        test_audio = media_dir / "LOUD.MP3"
 
         # Act
         app.add_files_to_queue([str(test_audio)])
 
-        # Assert - queue length should still be 1
-        assert len(app.file_queue) == 1
+        # Assert
+        assert list(app.file_queue.values()) == [test_audio]
 
-    @patch('transcribe_gui.Tk')
-    def test_remove_file_from_queue(self, mock_tk, temp_output_dir):
+    def test_add_duplicate_file_to_queue(self, app, media_dir):
         """
-        TC-GUI-009: Remove file from queue
+        TC-GUI-008b: Adding duplicate file to queue
 
-        Verify that a file can be removed from the queue.
+        Verify that duplicate files are not added twice.
         """
         # Arrange
-        test_audio = temp_output_dir / "test.mp3"
+        test_audio = media_dir / "test.mp3"
+        app.file_queue = {str(test_audio.resolve()): test_audio}  # Already in queue
+
+        # Act - once as queued, once by a different spelling of the same path
+        app.add_files_to_queue([str(test_audio), str(media_dir / "." / "test.mp3")])
 
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = [test_audio]
-            app.selected_file_index = 0
-            app.is_processing = False
-            app.update_file_list = Mock()
-            app.update_start_button = Mock()
+        # Assert - queue length should still be 1, and nothing is redrawn
+        assert len(app.file_queue) == 1
+        app._append_to_list.assert_not_called()
+
+    def test_remove_selected_file(self, app, processing_state, media_dir):
+        """
+        TC-GUI-009 / TC-GUI-009b: Remove file from queue
+
+        Verify that the selected file is removed when idle, and that the
+        queue is left untouched while processing.
+        """
+        # Arrange (processing_state is this same app with is_processing set)
+        test_audio = media_dir / "test.mp3"
+        app.file_queue = {str(test_audio.resolve()): test_audio}
+        app.selected_file_index = 0
 
         # Act
         app.remove_selected_file()
 
         # Assert
-        assert len(app.file_queue) == 0
-        assert app.selected_file_index is None
-        app.update_file_list.assert_called_once()
-        app.update_start_button.assert_called_once()
+        if processing_state.is_processing:
+            assert len(app.file_queue) == 1
+            app._remove_from_list.assert_not_called()
+        else:
+            assert len(app.file_queue) == 0
+            assert app.selected_file_index is None
+            app._remove_from_list.assert_called_once_with(str(test_audio.resolve()), 0)
+            app.remove_btn.config.assert_called_once_with(state='disabled')
+            app.update_start_button.assert_called_once()
 
-    @patch('transcribe_gui.Tk')
-    def test_remove_file_while_processing(self, mock_tk, temp_output_dir):
+    def test_remove_from_list_renumbers_following_rows(self, bare_app):
         """
-        TC-GUI-009b: Cannot remove file while processing
-
-        Verify that files cannot be removed during processing.
+        Verify removing a row only relabels the rows below it.
         """
-        # Arrange
-        test_audio = temp_output_dir / "test.mp3"
-
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = [test_audio]
-            app.selected_file_index = 0
-            app.is_processing = True  # Currently processing
-            app.update_file_list = Mock()
-            app.update_start_button = Mock()
+        # Arrange - rows "1. a", "2. b", "3. c" drawn; "a" already dequeued
+        bare_app.file_queue = {"b": Path("b"), "c": Path("c")}
+        bare_app.file_listbox = Mock(spec_set=('delete', 'get_children', 'insert', 'item'),
+                                     **{"get_children.return_value": ("b", "c")})
 
         # Act
-        app.remove_selected_file()
+        bare_app._remove_from_list("a", 0)
 
-        # Assert - file should still be in queue
-        assert len(app.file_queue) == 1
-        app.update_file_list.assert_not_called()
+        # Assert
+        bare_app.file_listbox.delete.assert_called_once_with("a")
+        assert bare_app.file_listbox.item.call_args_list == [
+            call("b", text="1. b"), call("c", text="2. c")
+        ]
+        bare_app.file_listbox.insert.assert_not_called()
 
-    @patch('transcribe_gui.Tk')
-    def test_detect_unsupported_file_type(self, mock_tk, temp_output_dir):
+    def test_detect_unsupported_file_type(self, app, media_dir):
         """
         TC-GUI-012: Detect unsupported file type
 
         Verify that unsupported file types are rejected with warning.
         """
         # Arrange
-        unsupported_file = temp_output_dir / "test.xyz"
-        unsupported_file.touch()  # Create unsupported file
-
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = []
-            app.update_file_list = Mock()
-            app.update_start_button = Mock()
+        unsupported_file = media_dir / "test.xyz"
 
         # Act
         app.add_files_to_queue([str(unsupported_file)])
@@ -274,206 +271,135 @@ class TestFileQueueOperations:
         # Assert - file should NOT be added to queue
         assert len(app.file_queue) == 0
 
-
-class TestStartButtonLogic:
-    """Test suite for start button enable/disable logic."""
-
-    @patch('transcribe_gui.Tk')
-    def test_update_start_button_enabled(self, mock_tk, temp_output_dir):
+    def test_add_folder_queues_media_inside(self, app, media_dir):
         """
-        TC-GUI-013: Start button enabled when conditions met
-
-        Verify start button is enabled when files and output folder are set.
+        Verify that dropping a folder queues its media files in name order.
         """
-        # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = [Path("/test/file.mp3")]
-            app.output_folder = str(temp_output_dir)
-            app.is_processing = False
-            app.start_button = Mock()
-
         # Act
-        app.update_start_button()
+        app.add_files_to_queue([str(media_dir)])
 
-        # Assert
-        app.start_button.config.assert_called_once_with(state='normal')
+        # Assert - test.xyz is skipped
+        assert list(app.file_queue) == [
+            str(media_dir.resolve() / "LOUD.MP3"), str(media_dir.resolve() / "test.mp3")
+        ]
 
-    @patch('transcribe_gui.Tk')
-    def test_update_start_button_disabled_no_files(self, mock_tk, temp_output_dir):
+    def test_add_unreadable_folder(self, app, media_dir, monkeypatch):
         """
-        TC-GUI-014: Start button disabled without files
-
-        Verify start button is disabled when no files in queue.
+        Verify a folder that can't be listed is reported and the rest of the drop still queues.
         """
         # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = []  # Empty queue
-            app.output_folder = str(temp_output_dir)
-            app.is_processing = False
-            app.start_button = Mock()
+        app.status_var = Mock(spec_set=('get', 'set'))
+        locked = media_dir / "locked"
+        locked.mkdir()
 
-        # Act
-        app.update_start_button()
+        def scandir(path):
+            raise PermissionError(13, "Permission denied", str(path))
 
-        # Assert
-        app.start_button.config.assert_called_once_with(state='disabled')
-
-    @patch('transcribe_gui.Tk')
-    def test_update_start_button_disabled_no_output(self, mock_tk):
-        """
-        TC-GUI-015: Start button disabled without output folder
-
-        Verify start button is disabled when no output folder set.
-        """
-        # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = [Path("/test/file.mp3")]
-            app.output_folder = None  # No output folder
-            app.is_processing = False
-            app.start_button = Mock()
+        monkeypatch.setattr(transcribe_gui.os, "scandir", scandir)
 
         # Act
-        app.update_start_button()
+        app.add_files_to_queue([str(locked), str(media_dir / "test.mp3")])
 
         # Assert
-        app.start_button.config.assert_called_once_with(state='disabled')
-
-    @patch('transcribe_gui.Tk')
-    def test_update_start_button_disabled_processing(self, mock_tk, temp_output_dir):
-        """
-        TC-GUI-016: Start button disabled during processing
-
-        Verify start button is disabled when currently processing.
-        """
-        # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.file_queue = [Path("/test/file.mp3")]
-            app.output_folder = str(temp_output_dir)
-            app.is_processing = True  # Currently processing
-            app.start_button = Mock()
+        assert list(app.file_queue.values()) == [media_dir / "test.mp3"]
+        app.status_var.set.assert_called_once_with("Skipped locked: Permission denied")
 
-        # Act
-        app.update_start_button()
 
-        # Assert
-        app.start_button.config.assert_called_once_with(state='disabled')
+# file_queue maps resolved path strings to the queued Paths
+ONE_FILE_QUEUE = {"/test/file.mp3": Path("/test/file.mp3")}
 
 
-class TestRemoveButtonLogic:
-    """Test suite for remove button enable/disable logic."""
+class TestStartButtonLogic:
+    """Test suite for start button enable/disable logic."""
 
-    @patch('transcribe_gui.Tk')
-    def test_update_remove_button_enabled(self, mock_tk):
+    @pytest.mark.parametrize("file_queue,output_folder,is_processing,expected", [
+        (ONE_FILE_QUEUE, "/tmp/out", False, "normal"),    # TC-GUI-013
+        ({}, "/tmp/out", False, "disabled"),              # TC-GUI-014: no files
+        (ONE_FILE_QUEUE, None, False, "disabled"),        # TC-GUI-015: no output folder
+        (ONE_FILE_QUEUE, "/tmp/out", True, "disabled"),   # TC-GUI-016: processing
+    ], ids=["enabled", "no_files", "no_output", "processing"])
+    def test_update_start_button(self, bare_app, file_queue, output_folder,
+                                 is_processing, expected):
         """
-        TC-GUI-017: Remove button enabled when file selected
-
-        Verify remove button is enabled when a file is selected.
+        Verify start button is enabled only with files, an output folder,
+        and no run in progress.
         """
         # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.selected_file_index = 0  # File selected
-            app.is_processing = False
-            app.remove_btn = Mock()
+        bare_app.file_queue = file_queue
+        bare_app.output_folder = output_folder
+        bare_app.is_processing = is_processing
 
         # Act
-        app.update_remove_button()
+        bare_app.update_start_button()
 
         # Assert
-        app.remove_btn.config.assert_called_once_with(state='normal')
+        bare_app.start_button.config.assert_called_once_with(state=expected)
 
-    @patch('transcribe_gui.Tk')
-    def test_update_remove_button_disabled_no_selection(self, mock_tk):
-        """
-        TC-GUI-018: Remove button disabled without selection
 
-        Verify remove button is disabled when no file is selected.
-        """
-        # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.selected_file_index = None  # No selection
-            app.is_processing = False
-            app.remove_btn = Mock()
-
-        # Act
-        app.update_remove_button()
-
-        # Assert
-        app.remove_btn.config.assert_called_once_with(state='disabled')
+class TestRemoveButtonLogic:
+    """Test suite for remove button enable/disable logic."""
 
-    @patch('transcribe_gui.Tk')
-    def test_update_remove_button_disabled_processing(self, mock_tk):
+    @pytest.mark.parametrize("selected_file_index,is_processing,expected", [
+        (0, False, "normal"),       # TC-GUI-017
+        (None, False, "disabled"),  # TC-GUI-018: no selection
+        (0, True, "disabled"),      # TC-GUI-019: processing
+    ], ids=["enabled", "no_selection", "processing"])
+    def test_update_remove_button(self, bare_app, selected_file_index,
+                                  is_processing, expected):
         """
-        TC-GUI-019: Remove button disabled during processing
-
-        Verify remove button is disabled when currently processing.
+        Verify remove button is enabled only with a selection and no run
+        in progress.
         """
         # Arrange
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.selected_file_index = 0  # File selected
-            app.is_processing = True  # Currently processing
-            app.remove_btn = Mock()
+        bare_app.selected_file_index = selected_file_index
+        bare_app.is_processing = is_processing
 
         # Act
-        app.update_remove_button()
+        bare_app.update_remove_button()
 
         # Assert
-        app.remove_btn.config.assert_called_once_with(state='disabled')
+        bare_app.remove_btn.config.assert_called_once_with(state=expected)
 
 
 class TestOutputFolderValidation:
     """Test suite for output folder validation."""
 
-    @patch('transcribe_gui.Tk')
-    @patch('transcribe_gui.filedialog.askdirectory')
-    def test_choose_output_folder_valid_path(self, mock_askdir, mock_tk, temp_output_dir):
+    @pytest.fixture
+    def app(self, bare_app):
+        """bare_app with config saving and the start button stubbed out."""
+        bare_app.save_config = Mock()
+        bare_app.update_start_button = Mock()
+        return bare_app
+
+    def test_choose_output_folder_valid_path(self, app, media_dir, monkeypatch):
         """
         TC-GUI-010: Choose output folder with valid path
 
         Verify that choosing a valid directory updates the output folder.
         """
         # Arrange
-        mock_askdir.return_value = str(temp_output_dir)
-
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.output_folder = None
-            app.folder_var = Mock()
-            app.save_config = Mock()
-            app.update_start_button = Mock()
+        monkeypatch.setattr(transcribe_gui.filedialog, "askdirectory",
+                            lambda **kwargs: str(media_dir))
 
         # Act
         app.choose_output_folder()
 
         # Assert
-        assert app.output_folder == str(temp_output_dir)
+        assert app.output_folder == str(media_dir)
         app.folder_var.set.assert_called_once()
         app.save_config.assert_called_once()
         app.update_start_button.assert_called_once()
 
-    @patch('transcribe_gui.Tk')
-    @patch('transcribe_gui.filedialog.askdirectory')
-    def test_choose_output_folder_cancel(self, mock_askdir, mock_tk):
+    def test_choose_output_folder_cancel(self, app, monkeypatch):
         """
         TC-GUI-011: Choose output folder cancelled
 
         Verify that canceling folder selection doesn't change output folder.
         """
         # Arrange
-        mock_askdir.return_value = ""  # User cancelled
-
-        with patch('transcribe_gui.HAS_DND', False):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
-            app.output_folder = "/original/path"
-            app.folder_var = Mock()
-            app.save_config = Mock()
-            app.update_start_button = Mock()
+        monkeypatch.setattr(transcribe_gui.filedialog, "askdirectory",
+                            lambda **kwargs: "")  # User cancelled
+        app.output_folder = "/original/path"
 
         # Act
         app.choose_output_folder()
@@ -483,105 +409,253 @@ class TestOutputFolderValidation:
         app.folder_var.set.assert_not_called()
         app.save_config.assert_not_called()
 
+    @pytest.mark.parametrize("path, shown", [
+        ("/short/path", "/short/path"),
+        ("/" + "x" * 60, "…" + "x" * 47),
+    ], ids=["short", "long"])
+    def test_short_keeps_path_tail(self, path, shown):
+        """
+        Verify long folder paths are shown as an ellipsis plus their tail.
+        """
+        assert transcribe_gui.TranscriptionApp._short(path) == shown
 
-class TestFormatTimestamp:
-    """Test suite for timestamp formatting."""
 
-    def test_format_timestamp_minutes_seconds(self):
+class TestModelLoading:
+    """Test suite for keeping the Whisper model loaded between runs."""
+
+    @pytest.fixture
+    def whisper_class(self, monkeypatch):
+        """WhisperModel replaced with a Mock."""
+        whisper_class = Mock()
+        monkeypatch.setattr(transcribe_gui, "WhisperModel", whisper_class)
+        monkeypatch.setattr(transcribe_gui.ctranslate2, "get_cuda_device_count", lambda: 0)
+        return whisper_class
+
+    def test_model_loaded_once_per_thread_count(self, bare_app, whisper_class):
+        """
+        Verify repeat runs reuse the model and a new thread count reloads it.
         """
-        TC-GUI-001: Format seconds to HH:MM:SS
+        # Act
+        bare_app._ensure_model(4)
+        first = bare_app.model
+        bare_app._ensure_model(4)
+
+        # Assert
+        whisper_class.assert_called_once()
+        assert bare_app.model is first
+
+        # Act - thread and worker counts changed between runs
+        bare_app._ensure_model(2, num_workers=4)
+
+        # Assert
+        assert whisper_class.call_count == 2
+        assert whisper_class.call_args[1]['cpu_threads'] == 2
+        assert whisper_class.call_args[1]['num_workers'] == 4
 
-        Verify that 125 seconds formats to "00:02:05".
+    def test_model_reloaded_for_new_compute_type(self, bare_app, whisper_class):
         """
-        # Arrange - Create a minimal mock app instance
-        with patch('transcribe_gui.Tk'):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        Verify "auto" resolves to int8 on the CPU and an override reloads.
+        """
+        # Act - "auto" and its CPU resolution are the same setting
+        bare_app._ensure_model(4)
+        bare_app._ensure_model(4, compute_type="int8")
 
-            # Act
-            result = app.format_timestamp(125)
+        # Assert
+        whisper_class.assert_called_once()
+        assert whisper_class.call_args[1]['compute_type'] == "int8"
 
-            # Assert
-            assert result == "00:02:05"
+        # Act
+        bare_app._ensure_model(4, compute_type="float32")
+
+        # Assert
+        assert whisper_class.call_count == 2
+        assert whisper_class.call_args[1]['compute_type'] == "float32"
 
-    def test_format_timestamp_zero(self):
+    @pytest.mark.parametrize("cuda_devices, expected", [(0, "int8"), (1, "int8_float16")],
+                             ids=["cpu", "cuda"])
+    def test_auto_compute_type_follows_device(self, monkeypatch, cuda_devices, expected):
         """
-        TC-GUI-002: Format zero seconds
+        Verify "auto" picks int8 weights for the device in use.
+        """
+        monkeypatch.setattr(transcribe_gui.ctranslate2, "get_cuda_device_count", lambda: cuda_devices)
+
+        assert transcribe_gui._resolve_compute_type("auto") == expected
 
-        Verify that 0.0 seconds formats to "00:00:00".
+    def test_pyannote_loaded_once_per_token(self, monkeypatch):
+        """
+        Verify the diarization pipeline is reused until the token changes.
         """
         # Arrange
-        with patch('transcribe_gui.Tk'):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        pipeline_class = Mock(spec_set=('from_pretrained',))
+        monkeypatch.setattr(transcribe_gui, "_torch_device", lambda: "cpu")
+        monkeypatch.setattr(transcribe_gui, "_load_pyannote_deps", lambda: None)
+        monkeypatch.setattr(transcribe_gui, "Pipeline", pipeline_class)
+        transcribe_gui._get_pyannote.cache_clear()
 
-            # Act
-            result = app.format_timestamp(0)
+        # Act
+        first = transcribe_gui._get_pyannote("hf_a")
+        second = transcribe_gui._get_pyannote("hf_a")
+        transcribe_gui._get_pyannote("hf_b")
+        transcribe_gui._get_pyannote.cache_clear()
 
-            # Assert
-            assert result == "00:00:00"
+        # Assert
+        assert first is second
+        assert pipeline_class.from_pretrained.call_count == 2
+        assert pipeline_class.from_pretrained.call_args[1]['token'] == "hf_b"
 
-    def test_format_timestamp_hours(self):
+    @pytest.mark.parametrize("stop_requested", [False, True], ids=["run", "stopped"])
+    def test_transcribe_parallel(self, bare_app, media_dir, stop_requested):
         """
-        TC-GUI-003: Format hours
-
-        Verify that 3665 seconds formats to "01:01:05".
+        Verify every queued file is transcribed, and waiting files are skipped after Stop.
         """
         # Arrange
-        with patch('transcribe_gui.Tk'):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        files = [media_dir / "test.mp3", media_dir / "LOUD.MP3"]
+        bare_app.root = Mock(spec_set=('after',))
+        bare_app.transcribe_file = Mock(return_value=True)
+        bare_app.stop_requested = stop_requested
 
-            # Act
-            result = app.format_timestamp(3665)
+        # Act
+        bare_app._transcribe_parallel(files, 2)
 
-            # Assert
-            assert result == "01:01:05"
+        # Assert - one status update up front, then progress + status per file
+        if stop_requested:
+            bare_app.transcribe_file.assert_not_called()
+        else:
+            assert sorted(c[0][0] for c in bare_app.transcribe_file.call_args_list) == sorted(files)
+        assert bare_app.root.after.call_count == 1 + 2 * len(files)
 
-    def test_format_timestamp_with_float(self):
+    def test_transcribe_parallel_starts_longest_first(self, bare_app, monkeypatch):
         """
-        TC-GUI-004: Handle fractional seconds
-
-        Verify that fractional seconds are truncated.
+        Verify files are handed to the workers in descending duration order.
         """
         # Arrange
-        with patch('transcribe_gui.Tk'):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        durations = {Path("short.mp3"): 60.0, Path("long.mp3"): 3600.0, Path("mid.mp3"): 600.0}
+        monkeypatch.setattr(transcribe_gui, "_media_duration", durations.get)
+        bare_app.root = Mock(spec_set=('after',))
+        bare_app.transcribe_file = Mock(return_value=True)
+        bare_app.stop_requested = False
 
-            # Act
-            result = app.format_timestamp(125.7)
+        # Act - one worker runs the files in submission order
+        bare_app._transcribe_parallel(list(durations), 1)
 
-            # Assert
-            assert result == "00:02:05"
+        # Assert
+        assert [c[0][0] for c in bare_app.transcribe_file.call_args_list] == [
+            Path("long.mp3"), Path("mid.mp3"), Path("short.mp3")
+        ]
+
+    def test_parallel_files_get_own_pipeline(self, bare_app, media_dir, monkeypatch):
+        """
+        Verify files transcribed at the same time don't share a batched pipeline.
+        """
+        # Arrange - each transcribe() waits until both files are decoding
+        both_running = threading.Barrier(2, timeout=5)
+        pipelines = []
+
+        def transcribe(*args, **kwargs):
+            both_running.wait()
+            return [], SimpleNamespace(language="en", duration=1.0)
+
+        def make_pipeline(model):
+            pipeline = Mock(spec_set=('model', 'transcribe'), model=model)
+            pipeline.transcribe.side_effect = transcribe
+            pipelines.append(pipeline)
+            return pipeline
+
+        monkeypatch.setattr(transcribe_gui, "BatchedInferencePipeline", make_pipeline)
+        monkeypatch.setattr(transcribe_gui, "decode_audio", Mock())
+        monkeypatch.setattr(transcribe_gui, "_media_duration", lambda path: 0.0)
+        bare_app.root = Mock(spec_set=('after',))
+        bare_app.model = Mock()
+        bare_app.output_folder = str(media_dir)
+        bare_app.stop_requested = False
+        bare_app.wavlm_model = bare_app.wavlm_feature_extractor = None
+        bare_app.diarization_pipeline = None
+        bare_app._overlap_diarization = False
+        bare_app._batch_size, bare_app._beam_size = 8, 1
+        bare_app._output_format = "plain"
+        bare_app._parallel_workers = 2
 
-    def test_format_timestamp_exactly_one_hour(self):
-        """
-        TC-GUI-005: Format exactly one hour
+        # Act
+        bare_app._transcribe_parallel([media_dir / "test.mp3", media_dir / "LOUD.MP3"], 2)
+
+        # Assert
+        assert len(pipelines) == 2
+        assert pipelines[0] is not pipelines[1]
+        assert all(pipeline.model is bare_app.model for pipeline in pipelines)
+        assert all(pipeline.transcribe.call_count == 1 for pipeline in pipelines)
 
-        Verify that 3600 seconds formats to "01:00:00".
+
+@pytest.fixture(scope="class")
+def shared_app(gui_patches):
+    """One uninitialised app shared by a test class, for pure methods."""
+    return transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+
+
+class TestProgressReporting:
+    """Test suite for handing transcription progress to the UI."""
+
+    @pytest.mark.parametrize("workers, redraws", [(1, 3), (2, 0)], ids=["serial", "parallel"])
+    def test_redraw_only_on_whole_percent_change(self, bare_app, workers, redraws):
+        """
+        Verify the UI is scheduled once per whole percent, and not at all
+        when files run in parallel.
         """
         # Arrange
-        with patch('transcribe_gui.Tk'):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        bare_app.root = Mock(spec_set=('after',))
+        bare_app._parallel_workers = workers
 
-            # Act
-            result = app.format_timestamp(3600)
+        # Act
+        for percent in (0.0, 0.4, 0.9, 1.2, 1.8, 95.0):
+            bare_app._set_progress(percent)
 
-            # Assert
-            assert result == "01:00:00"
+        # Assert
+        assert bare_app.current_progress == 95.0
+        assert bare_app.root.after.call_count == redraws
+        assert all(c == call(0, bare_app._show_progress) for c in bare_app.root.after.call_args_list)
 
-    def test_format_timestamp_large_value(self):
-        """
-        TC-GUI-006: Format large timestamp
 
-        Verify that large values (> 10 hours) are handled correctly.
+class TestFormatTimestamp:
+    """Test suite for timestamp formatting."""
+
+    @pytest.mark.parametrize("seconds,expected", [
+        (125, "00:02:05"),      # TC-GUI-001: minutes and seconds
+        (0, "00:00:00"),        # TC-GUI-002: zero
+        (3665, "01:01:05"),     # TC-GUI-003: hours
+        (125.7, "00:02:05"),    # TC-GUI-004: fractional seconds are truncated
+        (3600, "01:00:00"),     # TC-GUI-005: exactly one hour
+        (36000, "10:00:00"),    # TC-GUI-006: large value (10 hours)
+    ], ids=["min_sec", "zero", "hours", "float", "exact_hour", "large"])
+    def test_format_timestamp(self, shared_app, seconds, expected):
         """
-        # Arrange
-        with patch('transcribe_gui.Tk'):
-            app = transcribe_gui.TranscriptionApp.__new__(transcribe_gui.TranscriptionApp)
+        Verify that seconds are formatted as HH:MM:SS.
+        """
+        assert shared_app.format_timestamp(seconds) == expected
 
-            # Act
-            result = app.format_timestamp(36000)  # 10 hours
 
-            # Assert
-            assert result == "10:00:00"
+class TestSpeakerFinder:
+    """Test suite for matching times to pyannote speaker turns."""
+
+    @pytest.mark.parametrize("t, expected", [
+        (1.0, "SPEAKER_00"),    # only the long turn covers it
+        (2.5, "SPEAKER_00"),    # overlap: the earliest-starting turn wins
+        (5.0, "SPEAKER_00"),    # past the short turn, still inside the long one
+        (10.5, None),           # gap between turns
+        (12.0, "SPEAKER_01"),   # boundary is inclusive
+        (-1.0, None),           # before the first turn
+    ], ids=["long", "overlap", "after_short", "gap", "boundary", "before"])
+    def test_speaker_at(self, t, expected):
+        """
+        Verify each time maps to the speaker of a turn covering it.
+        """
+        # Arrange - (turn, track, speaker) triples as from itertracks, unsorted
+        turns = [
+            (SimpleNamespace(start=12.0, end=14.0), "c", "SPEAKER_01"),
+            (SimpleNamespace(start=0.0, end=10.0), "a", "SPEAKER_00"),
+            (SimpleNamespace(start=2.0, end=3.0), "b", "SPEAKER_01"),
+        ]
+
+        # Act / Assert
+        assert transcribe_gui._speaker_finder(turns)(t) == expected
 
 
 class TestMediaExtensions:
@@ -598,14 +672,12 @@ class TestMediaExtensions:
         assert ".mov" in transcribe_gui.MEDIA_EXTENSIONS
         assert ".m4a" in transcribe_gui.MEDIA_EXTENSIONS
 
-    def test_media_extensions_includes_uppercase(self):
+    def test_media_extensions_are_lowercase(self):
         """
-        Verify that MEDIA_EXTENSIONS includes uppercase variants.
+        Verify that MEDIA_EXTENSIONS holds only lowercase variants.
         """
         # Assert
-        assert ".MP3" in transcribe_gui.MEDIA_EXTENSIONS
-        assert ".WAV" in transcribe_gui.MEDIA_EXTENSIONS
-        assert ".MP4" in transcribe_gui.MEDIA_EXTENSIONS
+        assert all(ext == ext.lower() for ext in transcribe_gui.MEDIA_EXTENSIONS)
 
 
 # Example working test
@@ -6,145 +6,390 @@ Accepts JSON requests and outputs progress updates
 
 import os
 import sys
-import json
 import argparse
+import concurrent.futures
+import contextlib
+import functools
+import importlib.util
+import threading
 from pathlib import Path
 
-# Import transcription dependencies
-from faster_whisper import WhisperModel
-
-# Optional: WavLM for speaker diarization
+# Faster request parsing for large batch manifests; stdlib json otherwise
 try:
-    from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
-    import torch
-    import torchaudio
-    from sklearn.cluster import AgglomerativeClustering
-    import numpy as np
-    from collections import Counter
-    HAS_WAVLM = True
+    from orjson import loads as json_loads
 except ImportError:
-    HAS_WAVLM = False
+    from json import loads as json_loads
 
-# Optional: Pyannote for speaker diarization
-try:
-    from pyannote.audio import Pipeline
-    HAS_PYANNOTE = True
-except ImportError:
-    HAS_PYANNOTE = False
+# Import transcription dependencies
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+import ctranslate2
+
+# Optional: WavLM for speaker diarization. torch/transformers add seconds to
+# startup, so they are only imported once a diarization run needs them.
+HAS_WAVLM = all(
+    importlib.util.find_spec(name) is not None
+    for name in ('transformers', 'torch', 'sklearn', 'numpy')
+)
+Wav2Vec2FeatureExtractor = WavLMForXVector = AgglomerativeClustering = None
+torch = np = None
+
+# Optional: Pyannote for speaker diarization, imported lazily like WavLM
+# (pyannote is a namespace package, so check it before its submodule)
+HAS_PYANNOTE = (importlib.util.find_spec('pyannote') is not None
+                and importlib.util.find_spec('pyannote.audio') is not None)
+Pipeline = None
+
+# Sample rate Whisper and WavLM both expect
+SAMPLE_RATE = 16000
+
+# Whisper VAD: silences shorter than this don't split speech chunks (ms),
+# and each chunk keeps this much padding either side (ms)
+VAD_MIN_SILENCE_MS = 250
+VAD_SPEECH_PAD_MS = 200
+
+# Sliding window parameters for WavLM speaker embeddings (seconds)
+WINDOW_SIZE = 1.0
+WINDOW_STRIDE = 0.5
+# Windows per WavLM forward pass
+EMBEDDING_BATCH_SIZE = 32
+
+# Per-thread message prefix, set while files are transcribed in parallel so
+# each update says which file it belongs to
+_progress_scope = threading.local()
 
 
 def progress_print(value, message):
     """Output progress in format: PROGRESS:value:message"""
-    print(f"PROGRESS:{value:.2f}:{message}", flush=True)
+    message = getattr(_progress_scope, 'prefix', '') + message
+    sys.stdout.write(f"PROGRESS:{value:.2f}:{message}\n")
+    sys.stdout.flush()
+
+
+@contextlib.contextmanager
+def _file_progress(prefix):
+    """Prefix this thread's progress messages while the block runs"""
+    _progress_scope.prefix = prefix
+    try:
+        yield
+    finally:
+        del _progress_scope.prefix
 
 
 def output_print(file_path):
     """Output completed file path in format: OUTPUT:path"""
-    print(f"OUTPUT:{file_path}", flush=True)
+    sys.stdout.write(f"OUTPUT:{file_path}\n")
+    sys.stdout.flush()
+
+
+def _load_torch_deps():
+    """Import torch and numpy into module globals on first use"""
+    global torch, np
+    if torch is not None:
+        return
+    import torch
+    import numpy as np
+
+
+def _load_wavlm_deps():
+    """Import the WavLM diarization stack into module globals on first use"""
+    global Wav2Vec2FeatureExtractor, WavLMForXVector, AgglomerativeClustering
+    _load_torch_deps()
+    if AgglomerativeClustering is not None:
+        return
+    from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
+    from sklearn.cluster import AgglomerativeClustering
+
+
+def _load_pyannote_deps():
+    """Import the pyannote pipeline class into module globals on first use"""
+    global Pipeline
+    _load_torch_deps()
+    if Pipeline is not None:
+        return
+    from pyannote.audio import Pipeline
+
+
+@functools.lru_cache(maxsize=4)
+def _get_model(model_size, device, compute_type, cpu_threads=0, num_workers=1):
+    """Load a WhisperModel, reusing already-loaded weights for repeat requests"""
+    return WhisperModel(model_size, device=device, compute_type=compute_type,
+                        cpu_threads=cpu_threads, num_workers=num_workers)
+
+
+def _whisper_settings(compute_type=None):
+    """
+    Pick Whisper's device, quantization and CPU thread count.
+
+    int8 weights run about twice as fast as float32 on the CPU; on CUDA,
+    int8_float16 keeps activations in fp16. compute_type overrides the
+    quantization. Threads default to half the logical cores, roughly one
+    per physical core.
+    """
+    device = 'cuda' if ctranslate2.get_cuda_device_count() > 0 else 'cpu'
+    if not compute_type:
+        compute_type = 'int8_float16' if device == 'cuda' else 'int8'
+    cpu_threads = max(1, (os.cpu_count() or 4) // 2)
+    return device, compute_type, cpu_threads
+
+
+@functools.lru_cache(maxsize=1)
+def _get_wavlm(device):
+    """Load the WavLM feature extractor and model once, reusing them for later files"""
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
+    wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv').to(device).eval()
+    return feature_extractor, wavlm_model
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pyannote(hf_token):
+    """Load the pyannote diarization pipeline once, on the best available device"""
+    _load_pyannote_deps()
+    pipeline = Pipeline.from_pretrained('pyannote/speaker-diarization-3.1', token=hf_token)
+    pipeline.to(torch.device(_torch_device()))
+    return pipeline
+
+
+def _torch_device():
+    """Pick the fastest available torch device: CUDA, then Apple MPS, then CPU"""
+    if torch.cuda.is_available():
+        return 'cuda'
+    if torch.backends.mps.is_available():
+        return 'mps'
+    return 'cpu'
+
+
+def _sliding_windows(centers, total_duration):
+    """
+    Build overlapping WINDOW_SIZE windows every WINDOW_STRIDE seconds.
+
+    centers must be sorted. Each window is a dict with its start/end in
+    seconds and the [lo, hi) index range of the centres that fall inside
+    it; windows containing no word are dropped.
+    """
+    starts = np.arange(0, total_duration, WINDOW_STRIDE)
+    ends = np.minimum(starts + WINDOW_SIZE, total_duration)
+    los = np.searchsorted(centers, starts, side='left')
+    his = np.searchsorted(centers, ends, side='left')
+    return [
+        {'start': float(start), 'end': float(end), 'lo': int(lo), 'hi': int(hi)}
+        for start, end, lo, hi in zip(starts, ends, los, his)
+        if lo < hi
+    ]
+
+
+def _vote_word_speakers(num_words, windows, speaker_ids, num_speakers):
+    """
+    Majority-vote a speaker id for each word from the windows covering it.
+
+    windows must be in start order, as _sliding_windows builds them. Ties
+    go to the speaker of the earliest covering window; words that no window
+    covers get -1.
+    """
+    num_windows = len(windows)
+    los = np.fromiter((window['lo'] for window in windows), dtype=np.int64, count=num_windows)
+    his = np.fromiter((window['hi'] for window in windows), dtype=np.int64, count=num_windows)
+    speaker_ids = np.asarray(speaker_ids, dtype=np.int64)
+    word_ids = np.arange(num_words)
+
+    # Votes per (word, speaker) from a difference array: +1 at each window's
+    # lo, -1 at its hi, then a running sum down the words
+    deltas = np.zeros((num_words + 1, num_speakers), dtype=np.int64)
+    np.add.at(deltas, (los, speaker_ids), 1)
+    np.add.at(deltas, (his, speaker_ids), -1)
+    counts = np.cumsum(deltas[:-1], axis=0)
+
+    # Earliest window per (word, speaker): lo and hi both rise with window
+    # order, so among one speaker's windows the first with hi > word is the
+    # earliest covering it, if any does
+    first_vote = np.full((num_words, num_speakers), num_windows, dtype=np.int64)
+    for speaker in range(num_speakers):
+        speaker_windows = np.flatnonzero(speaker_ids == speaker)
+        if not len(speaker_windows):
+            continue
+        k = np.searchsorted(his[speaker_windows], word_ids, side='right')
+        candidate = speaker_windows[np.minimum(k, len(speaker_windows) - 1)]
+        covered = (k < len(speaker_windows)) & (los[candidate] <= word_ids)
+        first_vote[covered, speaker] = candidate[covered]
+
+    # Most votes wins; among equal counts, the earliest first vote
+    scores = counts * (num_windows + 1) - first_vote
+    votes = scores.argmax(axis=1)
+    votes[counts.max(axis=1) == 0] = -1
+    return votes
+
+
+def _match_turns(centers, turn_starts, turn_ends):
+    """
+    Index of the speaker turn each word centre falls in.
+
+    turn_starts must be sorted. A centre covered by one or more turns takes
+    the earliest-starting of them: reach (the running maximum of turn ends)
+    first reaches the centre at exactly that turn. Words in the gaps
+    between turns go to the nearer of the turn that ended last before them
+    and the next turn to start.
+    """
+    last = len(turn_starts) - 1
+    reach = np.maximum.accumulate(turn_ends)
+    # Latest turn achieving each running maximum, i.e. the last to end so far
+    reach_turn = np.maximum.accumulate(np.where(turn_ends >= reach, np.arange(last + 1), 0))
+
+    started = np.searchsorted(turn_starts, centers, side='right') - 1
+    covering = np.searchsorted(reach, centers, side='left')
+    covered = (started >= 0) & (covering <= started)
+
+    before = reach_turn[np.clip(started, 0, last)]
+    after = np.minimum(started + 1, last)
+
+    def distance(turn):
+        return np.maximum(turn_starts[turn] - centers, 0) + np.maximum(centers - turn_ends[turn], 0)
+
+    nearest = np.where(distance(before) <= distance(after), before, after)
+    return np.where(covered, np.minimum(covering, last), nearest)
+
+
+def _extract_embeddings(audio, windows, feature_extractor, wavlm_model, device):
+    """
+    Compute a normalised WavLM speaker embedding for each window.
+
+    Windows are padded and run through the model (already on device)
+    EMBEDDING_BATCH_SIZE at a time. Returns the embeddings and the windows
+    they belong to; windows shorter than 0.1s, or in a batch that fails,
+    are skipped.
+    """
+    # Sample bounds for every window at once; each clip is then a zero-copy
+    # slice of the decoded audio
+    starts = (np.fromiter((window['start'] for window in windows), dtype=np.float64,
+                          count=len(windows)) * SAMPLE_RATE).astype(np.int64)
+    ends = (np.fromiter((window['end'] for window in windows), dtype=np.float64,
+                        count=len(windows)) * SAMPLE_RATE).astype(np.int64)
+
+    # Skip very short segments (less than 0.1 seconds once clipped to the audio)
+    long_enough = np.flatnonzero(np.minimum(ends, len(audio)) - starts >= 1600)
+    clips = [audio[starts[i]:ends[i]] for i in long_enough]
+    clip_windows = [windows[i] for i in long_enough]
+
+    embeddings_list = []
+    valid_windows = []
+    for i in range(0, len(clips), EMBEDDING_BATCH_SIZE):
+        batch = slice(i, i + EMBEDDING_BATCH_SIZE)
+        try:
+            inputs = feature_extractor(
+                clips[batch],
+                sampling_rate=SAMPLE_RATE,
+                return_tensors="pt",
+                padding=True,
+                return_attention_mask=True
+            )
+
+            inputs = {name: value.to(device) for name, value in inputs.items()}
+
+            # Half precision only where the hardware has fast fp16 kernels
+            autocast = (torch.autocast('cuda', dtype=torch.float16)
+                        if device == 'cuda' else contextlib.nullcontext())
+            with torch.inference_mode(), autocast:
+                embeddings = wavlm_model(**inputs).embeddings
+            embeddings = torch.nn.functional.normalize(embeddings.float(), dim=-1)
+        except Exception:
+            continue
+
+        embeddings_list.extend(embeddings.cpu().numpy())
+        valid_windows.extend(clip_windows[batch])
+
+    return embeddings_list, valid_windows
 
 
-def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
+def _load_diarization_models():
+    """Import the WavLM stack and load its models on the best device"""
+    _load_wavlm_deps()
+    device = _torch_device()
+    feature_extractor, wavlm_model = _get_wavlm(device)
+    return device, feature_extractor, wavlm_model
+
+
+def _write_speaker_transcript(output_path, audio_path, info, segments_list, all_words):
+    """Write words grouped by speaker, or plain segments when no word carries a speaker"""
+    with open(output_path, 'w', encoding='utf-8', buffering=1 << 20) as f:
+        f.write(f"Transcript: {Path(audio_path).name}\n")
+        f.write(f"Language: {info.language}\n")
+        f.write(f"Duration: {info.duration:.2f} seconds\n")
+        f.write("-" * 80 + "\n\n")
+
+        # Stream words, starting a new paragraph whenever the speaker changes.
+        # Diarization labels every word or none, so the first word decides.
+        if all_words and hasattr(all_words[0], 'speaker'):
+            write = f.write
+            current_speaker = None
+            for word in all_words:
+                speaker = word.speaker
+                if speaker != current_speaker:
+                    if current_speaker is not None:
+                        write("\n\n")
+                    write(f"{speaker}: {word.word.strip()}")
+                    current_speaker = speaker
+                else:
+                    write(f" {word.word.strip()}")
+            write("\n\n")
+        else:
+            # No diarization - just write segments
+            for segment in segments_list:
+                f.write(f"{segment.text.strip()}\n\n")
+
+
+def transcribe_with_wavlm(model, audio_path, num_speakers, output_path, beam_size=1,
+                          vad_min_silence_ms=VAD_MIN_SILENCE_MS):
     """Transcribe audio file with WavLM speaker diarization"""
     progress_print(0.1, f"Starting transcription: {Path(audio_path).name}")
 
+    # Decode once to 16 kHz mono; Whisper and WavLM share the buffer
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
     # Transcribe with Whisper
     segments, info = model.transcribe(
-        audio_path,
+        audio,
         language=None,
-        beam_size=5,
+        beam_size=beam_size,
         vad_filter=True,
-        vad_parameters=dict(min_silence_duration_ms=100),
+        vad_parameters=dict(min_silence_duration_ms=vad_min_silence_ms,
+                            speech_pad_ms=VAD_SPEECH_PAD_MS),
         word_timestamps=True
     )
 
     progress_print(0.3, f"Transcribing ({info.language}, {info.duration:.1f}s)...")
 
-    # Collect segments
-    segments_list = list(segments)
-    progress_print(0.6, f"Processing {len(segments_list)} segments...")
-
-    # Collect all words
+    # Collect segments and words as Whisper decodes them. Once the first word
+    # arrives, load the WavLM models on a worker thread so that overlaps with
+    # the rest of the decode.
+    segments_list = []
     all_words = []
-    for segment in segments_list:
-        if hasattr(segment, 'words') and segment.words:
-            all_words.extend(segment.words)
+    diarization_models = None
+    with concurrent.futures.ThreadPoolExecutor(max_workers=1) as executor:
+        for segment in segments:
+            segments_list.append(segment)
+            if segment.words:
+                all_words.extend(segment.words)
+                if diarization_models is None:
+                    diarization_models = executor.submit(_load_diarization_models)
+    progress_print(0.6, f"Processing {len(segments_list)} segments...")
 
     if not all_words:
         progress_print(0.7, "No words found, skipping diarization")
-        speaker_labels = {}
     else:
         progress_print(0.7, f"Running speaker diarization on {len(all_words)} words...")
 
-        # Load WavLM models
-        feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
-        wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv')
-
-        # Load audio
-        waveform, sample_rate = torchaudio.load(audio_path)
-        if sample_rate != 16000:
-            resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-            waveform = resampler(waveform)
-            sample_rate = 16000
-
-        # Create sliding windows
-        WINDOW_SIZE = 1.0
-        WINDOW_STRIDE = 0.5
-
-        segments_for_embedding = []
-        total_duration = all_words[-1].end if all_words else 0
-
-        current_time = 0
-        while current_time < total_duration:
-            window_start = current_time
-            window_end = min(current_time + WINDOW_SIZE, total_duration)
-
-            # Find words in this window
-            window_word_indices = []
-            for i, word in enumerate(all_words):
-                word_center = (word.start + word.end) / 2
-                if window_start <= word_center < window_end:
-                    window_word_indices.append(i)
-
-            if window_word_indices:
-                segments_for_embedding.append({
-                    'word_indices': window_word_indices,
-                    'start': window_start,
-                    'end': window_end
-                })
-
-            current_time += WINDOW_STRIDE
+        device, feature_extractor, wavlm_model = diarization_models.result()
+
+        # Create sliding windows over the word centres (sorted for searchsorted)
+        total_duration = all_words[-1].end
+        centers = np.array([(word.start + word.end) / 2 for word in all_words])
+        order = np.argsort(centers, kind='stable')
+        segments_for_embedding = _sliding_windows(centers[order], total_duration)
 
         progress_print(0.75, f"Extracting embeddings for {len(segments_for_embedding)} windows...")
 
         # Extract embeddings
-        embeddings_list = []
-        valid_segments = []
-
-        for seg_info in segments_for_embedding:
-            try:
-                start_sample = int(seg_info['start'] * sample_rate)
-                end_sample = int(seg_info['end'] * sample_rate)
-                segment_audio = waveform[:, start_sample:end_sample]
-
-                # Skip very short segments
-                if segment_audio.shape[1] < 1600:  # Less than 0.1 seconds
-                    continue
-
-                inputs = feature_extractor(
-                    segment_audio.squeeze().numpy(),
-                    sampling_rate=16000,
-                    return_tensors="pt",
-                    padding=True
-                )
-
-                with torch.no_grad():
-                    embedding = wavlm_model(**inputs).embeddings
-                    embedding = torch.nn.functional.normalize(embedding, dim=-1)
-
-                embeddings_list.append(embedding[0].cpu().numpy())
-                valid_segments.append(seg_info)
-            except Exception as e:
-                continue
+        embeddings_list, valid_segments = _extract_embeddings(
+            audio, segments_for_embedding, feature_extractor, wavlm_model, device
+        )
 
         if len(embeddings_list) < num_speakers:
             progress_print(0.8, f"Not enough data for {num_speakers} speakers, using 1")
@@ -154,112 +399,166 @@ def transcribe_with_wavlm(model, audio_path, num_speakers, output_path):
         embeddings_array = np.array(embeddings_list)
         progress_print(0.85, f"Clustering {len(embeddings_array)} embeddings...")
 
+        # The embeddings are unit length, so cosine distance is 1 - x.y: one
+        # matmul, and an all-zero embedding can't produce NaN distances
+        distances = np.clip(1.0 - embeddings_array @ embeddings_array.T, 0.0, 2.0)
+        np.fill_diagonal(distances, 0.0)
+
         clustering = AgglomerativeClustering(
             n_clusters=num_speakers,
-            metric='cosine',
+            metric='precomputed',
             linkage='average'
         )
-        speaker_ids = clustering.fit_predict(embeddings_array)
-
-        # Assign speaker labels to segments
-        for i, seg_info in enumerate(valid_segments):
-            seg_info['speaker'] = f"SPEAKER_{speaker_ids[i]:02d}"
+        speaker_ids = clustering.fit_predict(distances)
 
         # Assign speakers to words using majority voting
-        for word_idx, word in enumerate(all_words):
-            speaker_votes = []
-            for seg_info in valid_segments:
-                if word_idx in seg_info['word_indices']:
-                    speaker_votes.append(seg_info['speaker'])
-
-            if speaker_votes:
-                speaker_counts = Counter(speaker_votes)
-                word.speaker = speaker_counts.most_common(1)[0][0]
-            else:
-                word.speaker = "SPEAKER_00"
+        word_speakers = np.empty(len(all_words), dtype=np.int64)
+        word_speakers[order] = _vote_word_speakers(
+            len(all_words), valid_segments, speaker_ids, num_speakers
+        )
+        for word, speaker_id in zip(all_words, word_speakers):
+            word.speaker = f"SPEAKER_{max(speaker_id, 0):02d}"
 
     progress_print(0.9, "Writing transcript...")
+    _write_speaker_transcript(output_path, audio_path, info, segments_list, all_words)
 
-    # Write output
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write(f"Transcript: {Path(audio_path).name}\n")
-        f.write(f"Language: {info.language}\n")
-        f.write(f"Duration: {info.duration:.2f} seconds\n")
-        f.write("-" * 80 + "\n\n")
+    progress_print(1.0, "Complete")
+    return output_path
 
-        # Group words by speaker
-        if all_words and hasattr(all_words[0], 'speaker'):
-            current_speaker = None
-            current_text = []
 
-            for word in all_words:
-                speaker = getattr(word, 'speaker', 'SPEAKER_00')
-                if speaker != current_speaker:
-                    if current_text:
-                        f.write(f"{current_speaker}: {' '.join(current_text)}\n\n")
-                    current_speaker = speaker
-                    current_text = [word.word.strip()]
-                else:
-                    current_text.append(word.word.strip())
+def transcribe_with_pyannote(model, audio_path, num_speakers, output_path, pipeline, beam_size=1,
+                             vad_min_silence_ms=VAD_MIN_SILENCE_MS):
+    """Transcribe audio file with pyannote speaker diarization"""
+    progress_print(0.1, f"Starting transcription: {Path(audio_path).name}")
+
+    # Decode once to 16 kHz mono; Whisper and pyannote share the buffer
+    audio = decode_audio(audio_path, sampling_rate=SAMPLE_RATE)
+
+    # Transcribe with Whisper
+    segments, info = model.transcribe(
+        audio,
+        language=None,
+        beam_size=beam_size,
+        vad_filter=True,
+        vad_parameters=dict(min_silence_duration_ms=vad_min_silence_ms,
+                            speech_pad_ms=VAD_SPEECH_PAD_MS),
+        word_timestamps=True
+    )
+
+    progress_print(0.3, f"Transcribing ({info.language}, {info.duration:.1f}s)...")
+
+    segments_list = []
+    all_words = []
+    for segment in segments:
+        segments_list.append(segment)
+        if segment.words:
+            all_words.extend(segment.words)
+    progress_print(0.6, f"Processing {len(segments_list)} segments...")
+
+    if not all_words:
+        progress_print(0.7, "No words found, skipping diarization")
+    else:
+        progress_print(0.7, f"Running speaker diarization on {len(all_words)} words...")
+
+        # pyannote takes in-memory audio as a (channel, time) tensor
+        _load_torch_deps()
+        diarization = pipeline(
+            {'waveform': torch.from_numpy(audio[None]), 'sample_rate': SAMPLE_RATE},
+            num_speakers=num_speakers or None
+        )
+        turns = list(diarization.speaker_diarization.itertracks(yield_label=True))
 
-            if current_text:
-                f.write(f"{current_speaker}: {' '.join(current_text)}\n\n")
+        if not turns:
+            progress_print(0.8, "No speaker turns detected, skipping diarization")
         else:
-            # No diarization - just write segments
-            for segment in segments_list:
-                f.write(f"{segment.text.strip()}\n\n")
+            progress_print(0.85, f"Assigning {len(turns)} speaker turns to words...")
+            turn_starts = np.array([turn.start for turn, _, _ in turns])
+            turn_ends = np.array([turn.end for turn, _, _ in turns])
+            order = np.argsort(turn_starts, kind='stable')
+
+            centers = np.array([(word.start + word.end) / 2 for word in all_words])
+            word_turns = order[_match_turns(centers, turn_starts[order], turn_ends[order])]
+            for word, turn in zip(all_words, word_turns):
+                word.speaker = str(turns[turn][2])
+
+    progress_print(0.9, "Writing transcript...")
+    _write_speaker_transcript(output_path, audio_path, info, segments_list, all_words)
 
     progress_print(1.0, "Complete")
     return output_path
 
 
-def transcribe_simple(model, audio_path, output_path):
+def transcribe_simple(model, audio_path, output_path, beam_size=1,
+                      vad_min_silence_ms=VAD_MIN_SILENCE_MS):
     """Simple transcription without diarization"""
     progress_print(0.1, f"Starting transcription: {Path(audio_path).name}")
 
     segments, info = model.transcribe(
         audio_path,
         language=None,
-        beam_size=5,
+        beam_size=beam_size,
         vad_filter=True,
-        vad_parameters=dict(min_silence_duration_ms=100)
+        vad_parameters=dict(min_silence_duration_ms=vad_min_silence_ms,
+                            speech_pad_ms=VAD_SPEECH_PAD_MS)
     )
 
     progress_print(0.3, f"Transcribing ({info.language}, {info.duration:.1f}s)...")
 
-    segments_list = list(segments)
-    progress_print(0.7, f"Processing {len(segments_list)} segments...")
-
-    # Write output
+    # Write output, streaming segments to disk as Whisper decodes them
+    segment_count = 0
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(f"Transcript: {Path(audio_path).name}\n")
         f.write(f"Language: {info.language}\n")
         f.write(f"Duration: {info.duration:.2f} seconds\n")
         f.write("-" * 80 + "\n\n")
 
-        for segment in segments_list:
+        for segment in segments:
             f.write(f"{segment.text.strip()}\n\n")
+            segment_count += 1
 
+    progress_print(0.9, f"Processed {segment_count} segments")
     progress_print(1.0, "Complete")
     return output_path
 
 
-def main():
-    parser = argparse.ArgumentParser(description='CLI Transcription Tool')
-    parser.add_argument('--json', type=str, help='Path to JSON request file')
-    args = parser.parse_args()
+def main(argv=None, config=None):
+    """
+    Run a transcription request.
+
+    argv overrides sys.argv[1:]; config is an already-parsed request dict,
+    in which case command line parsing and the JSON file read are skipped.
+    The request's optional beamSize (default 1, greedy) trades speed for
+    accuracy; 5 matches faster-whisper's own default. computeType overrides
+    the int8 quantization picked by _whisper_settings. parallelFiles (default
+    1) transcribes that many files at once on one shared model, splitting
+    the CPU threads between them. vadMinSilenceMs (default 250) is the
+    shortest pause that splits speech for Whisper. diarizationMethod
+    'pyannote' uses the pyannote pipeline (hfToken authenticates the model
+    download), and 'auto' prefers it over WavLM when it is installed.
+    """
+    if config is not None:
+        request = config
+    else:
+        parser = argparse.ArgumentParser(
+            description='CLI Transcription Tool',
+            epilog='Optional request field beamSize: 1 (default) decodes greedily and is '
+                   'fastest; larger beams (e.g. 5) are several times slower for a small '
+                   'accuracy gain.'
+        )
+        parser.add_argument('--json', type=str, help='Path to JSON request file')
+        args = parser.parse_args(argv)
 
-    if not args.json:
-        print("Error: --json argument required", file=sys.stderr)
-        sys.exit(1)
+        if not args.json:
+            print("Error: --json argument required", file=sys.stderr)
+            sys.exit(1)
 
-    # Read JSON request
-    try:
-        with open(args.json, 'r') as f:
-            request = json.load(f)
-    except Exception as e:
-        print(f"Error reading JSON: {e}", file=sys.stderr)
-        sys.exit(1)
+        # Read JSON request
+        try:
+            with open(args.json, 'rb') as f:
+                request = json_loads(f.read())
+        except Exception as e:
+            print(f"Error reading JSON: {e}", file=sys.stderr)
+            sys.exit(1)
 
     # Parse request
     audio_files = request.get('audioFiles', [])
@@ -268,6 +567,14 @@ def main():
     enable_diarization = request.get('enableDiarization', False)
     diarization_method = request.get('diarizationMethod', 'wavlm')
     num_speakers = request.get('numSpeakers', 2)
+    hf_token = request.get('hfToken')
+    # Greedy decoding by default: beam search costs several times the decoder
+    # time for little accuracy gain on ordinary speech
+    beam_size = int(request.get('beamSize', 1))
+    compute_type = request.get('computeType')
+    # Longer minimum silences mean fewer, longer VAD chunks for Whisper
+    vad_min_silence_ms = int(request.get('vadMinSilenceMs', VAD_MIN_SILENCE_MS))
+    parallel_files = max(1, min(int(request.get('parallelFiles', 1)), len(audio_files)))
     output_path_base = request.get('outputPath', str(Path.home() / 'Documents'))
 
     if not audio_files:
@@ -276,29 +583,70 @@ def main():
 
     # Load Whisper model
     progress_print(0.0, f"Loading Whisper {model_size} model...")
-    model = WhisperModel(model_size, device="auto", compute_type="auto")
+    device, compute_type, cpu_threads = _whisper_settings(compute_type)
+    # CTranslate2 runs one transcription per worker concurrently, all sharing
+    # the same weights, so parallel files split the threads instead of
+    # each loading its own model
+    whisper_model = _get_model(model_size, device, compute_type,
+                               max(1, cpu_threads // parallel_files), parallel_files)
+
+    # Load the pyannote pipeline once for all files; 'auto' falls back to WavLM
+    pipeline = None
+    if enable_diarization and diarization_method in ('pyannote', 'auto') and HAS_PYANNOTE:
+        progress_print(0.0, "Loading pyannote diarization pipeline...")
+        try:
+            pipeline = _get_pyannote(hf_token)
+        except Exception as e:
+            print(f"Error loading pyannote pipeline: {e}", file=sys.stderr)
 
-    # Process each file
     total_files = len(audio_files)
-    for i, audio_path in enumerate(audio_files, 1):
-        file_progress_base = (i - 1) / total_files
-        file_progress_range = 1.0 / total_files
-
-        progress_print(file_progress_base, f"File {i}/{total_files}: {Path(audio_path).name}")
 
-        # Determine output path
+    def process(audio_path):
+        """Transcribe one file, returning its output path or None if it failed"""
         output_file = Path(output_path_base) / f"{Path(audio_path).stem}.txt"
-
+        # Decode the file's VAD chunks in batches instead of one 30s window at
+        # a time. The pipeline keeps per-run word timestamp state, so each file
+        # gets its own wrapper around the shared model.
+        model = BatchedInferencePipeline(model=whisper_model)
         try:
-            if enable_diarization and diarization_method == 'wavlm' and HAS_WAVLM:
-                output_file = transcribe_with_wavlm(model, audio_path, num_speakers, output_file)
-            else:
-                output_file = transcribe_simple(model, audio_path, output_file)
-
-            output_print(str(output_file))
+            if pipeline is not None:
+                return transcribe_with_pyannote(model, audio_path, num_speakers, output_file,
+                                                pipeline, beam_size=beam_size,
+                                                vad_min_silence_ms=vad_min_silence_ms)
+            if enable_diarization and diarization_method in ('wavlm', 'auto') and HAS_WAVLM:
+                return transcribe_with_wavlm(model, audio_path, num_speakers, output_file,
+                                             beam_size=beam_size,
+                                             vad_min_silence_ms=vad_min_silence_ms)
+            return transcribe_simple(model, audio_path, output_file, beam_size=beam_size,
+                                     vad_min_silence_ms=vad_min_silence_ms)
         except Exception as e:
             print(f"Error processing {audio_path}: {e}", file=sys.stderr)
-            continue
+            return None
+
+    def process_tagged(i, audio_path):
+        """process() with this file's progress messages prefixed by its number"""
+        with _file_progress(f"[{i}/{total_files}] "):
+            return process(audio_path)
+
+    # Process each file
+    if parallel_files == 1:
+        for i, audio_path in enumerate(audio_files, 1):
+            progress_print((i - 1) / total_files, f"File {i}/{total_files}: {Path(audio_path).name}")
+            output_file = process(audio_path)
+            if output_file is not None:
+                output_print(str(output_file))
+    else:
+        progress_print(0.0, f"Transcribing {total_files} files, {parallel_files} at a time...")
+        with concurrent.futures.ThreadPoolExecutor(max_workers=parallel_files) as executor:
+            futures = [
+                executor.submit(process_tagged, i, audio_path)
+                for i, audio_path in enumerate(audio_files, 1)
+            ]
+            for done, future in enumerate(concurrent.futures.as_completed(futures), 1):
+                output_file = future.result()
+                if output_file is not None:
+                    output_print(str(output_file))
+                progress_print(done / total_files, f"Finished {done}/{total_files} files")
 
     progress_print(1.0, f"All files complete ({total_files} files)")
 
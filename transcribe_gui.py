@@ -6,11 +6,16 @@ Designed following Apple Human Interface Guidelines for macOS
 
 import os
 import sys
+import bisect
+import itertools
 import threading
 import json
+import concurrent.futures
+import functools
+import importlib.util
 import multiprocessing
 from pathlib import Path
-from tkinter import Tk, Frame, Label, Button, Text, Scrollbar, filedialog, StringVar, BooleanVar, IntVar, Checkbutton, Entry
+from tkinter import Tk, Frame, Label, Button, Scrollbar, filedialog, StringVar, BooleanVar, IntVar, Checkbutton, Entry
 from tkinter import ttk
 import tkinter as tk
 
@@ -20,44 +25,175 @@ try:
 except ImportError:
     HAS_DND = False
 
-from faster_whisper import WhisperModel
+from faster_whisper import WhisperModel, BatchedInferencePipeline, decode_audio
+import av
+import ctranslate2
+from huggingface_hub.constants import HF_HUB_CACHE
+
+# Check for pyannote for speaker diarization (optional). Like WavLM below, the
+# import itself waits for _load_pyannote_deps(); it drags in torch.
+# (pyannote is a namespace package, so check it before its submodule)
+HAS_DIARIZATION = (importlib.util.find_spec('pyannote') is not None
+                   and importlib.util.find_spec('pyannote.audio') is not None)
+Pipeline = None
+print(f"DEBUG: pyannote.audio {'available' if HAS_DIARIZATION else 'NOT available'} - HAS_DIARIZATION={HAS_DIARIZATION}")
+
+# Check for WavLM and sklearn for speaker diarization (does not require HF token).
+# The imports themselves are deferred to _load_wavlm_deps(), since torch and
+# transformers add seconds to startup.
+HAS_WAVLM = all(
+    importlib.util.find_spec(name) is not None
+    for name in ('transformers', 'torch', 'sklearn', 'numpy')
+)
+Wav2Vec2FeatureExtractor = WavLMForXVector = AgglomerativeClustering = None
+torch = np = None
+print(f"DEBUG: WavLM {'available' if HAS_WAVLM else 'NOT available'} - HAS_WAVLM={HAS_WAVLM}")
+
+
+def _load_torch_deps():
+    """Import torch and numpy into module globals on first use"""
+    global torch, np
+    if torch is not None:
+        return
+    import torch
+    import numpy as np
 
-# Try to import pyannote for speaker diarization (optional)
-try:
-    from pyannote.audio import Pipeline
-    HAS_DIARIZATION = True
-    print("DEBUG: pyannote.audio loaded successfully - HAS_DIARIZATION=True")
-except ImportError as e:
-    HAS_DIARIZATION = False
-    Pipeline = None
-    print(f"DEBUG: pyannote.audio NOT available - HAS_DIARIZATION=False ({e})")
-
-# Try to import WavLM and sklearn for speaker diarization (does not require HF token)
-try:
+
+def _load_wavlm_deps():
+    """Import the WavLM diarization stack into module globals on first use"""
+    global Wav2Vec2FeatureExtractor, WavLMForXVector, AgglomerativeClustering
+    _load_torch_deps()
+    if AgglomerativeClustering is not None:
+        return
     from transformers import Wav2Vec2FeatureExtractor, WavLMForXVector
-    import torch
-    import torchaudio
     from sklearn.cluster import AgglomerativeClustering
-    import numpy as np
-    HAS_WAVLM = True
-    print("DEBUG: WavLM loaded successfully - HAS_WAVLM=True")
-except ImportError as e:
-    HAS_WAVLM = False
-    print(f"DEBUG: WavLM NOT available - HAS_WAVLM=False ({e})")
+
+
+def _load_pyannote_deps():
+    """Import the pyannote pipeline class into module globals on first use"""
+    global Pipeline
+    _load_torch_deps()
+    if Pipeline is not None:
+        return
+    from pyannote.audio import Pipeline
+
+
+@functools.lru_cache(maxsize=1)
+def _get_wavlm():
+    """Load the WavLM feature extractor and model once, reusing them for later runs"""
+    _load_wavlm_deps()
+    feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
+    wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv')
+    return feature_extractor, wavlm_model
+
+
+@functools.lru_cache(maxsize=1)
+def _get_pyannote(hf_token):
+    """Load the pyannote pipeline once per token, reusing it for later runs"""
+    _load_pyannote_deps()
+    pipeline = Pipeline.from_pretrained("pyannote/speaker-diarization-3.1", token=hf_token)
+    pipeline.to(_torch_device())
+    return pipeline
+
+
+def _torch_device():
+    """Pick the fastest available torch device: CUDA, then Apple MPS, then CPU"""
+    _load_torch_deps()
+    if torch.cuda.is_available():
+        return torch.device('cuda')
+    if torch.backends.mps.is_available():
+        return torch.device('mps')
+    return torch.device('cpu')
+
+
+def _media_duration(path):
+    """
+    Read a media file's duration in seconds from its container header.
+
+    Only the header is parsed (no decoding); files PyAV can't open count as 0.
+    """
+    try:
+        with av.open(str(path)) as container:
+            return (container.duration or 0) / av.time_base
+    except Exception:
+        return 0.0
+
+
+def _resolve_compute_type(compute_type):
+    """
+    Turn "auto" into int8_float16 on CUDA and int8 on the CPU.
+
+    Whisper decoding is memory-bandwidth bound; int8 weights move half the
+    bytes of float16 (a quarter of float32) for about the same accuracy.
+    Any other value is passed through as the user's override.
+    """
+    if compute_type != "auto":
+        return compute_type
+    return "int8_float16" if ctranslate2.get_cuda_device_count() > 0 else "int8"
+
+
+def _speaker_finder(speaker_turns):
+    """
+    Build a lookup from a time (seconds) to the speaker talking then, or None.
+
+    Turns are bisected by start time, so each lookup is O(log n) rather than
+    a scan of every turn. Where turns overlap, the earliest-starting one
+    wins, as with a scan in itertracks order: reach (the running maximum
+    of turn ends) first reaches t at exactly that turn.
+    """
+    turns = sorted(speaker_turns, key=lambda t: t[0].start)
+    starts = [turn.start for turn, _, _ in turns]
+    speakers = [str(spk) for _, _, spk in turns]
+    reach = list(itertools.accumulate((turn.end for turn, _, _ in turns), max))
+
+    def speaker_at(t):
+        i = bisect.bisect_left(reach, t)
+        if i < bisect.bisect_right(starts, t):
+            return speakers[i]
+        return None
+
+    return speaker_at
+
 
 # Configuration file path
 CONFIG_FILE = Path.home() / '.transcribe_anything_config.json'
+# Settings changes within this window (ms) are written to disk once
+CONFIG_SAVE_DELAY_MS = 500
 
 # Configuration
 MODEL_SIZE = "medium"
+# Sample rate Whisper, WavLM and pyannote all take audio at
+SAMPLE_RATE = 16000
+# VAD chunks decoded per model call; higher is faster but needs more memory
+BATCH_SIZE = 8
+MAX_BATCH_SIZE = 32
+# Quality setting -> beam width. Greedy decoding ("Fast") does about a fifth of
+# the decoder work of beam 5 for a small accuracy loss on clear speech. The
+# batched pipeline decodes once at temperature 0 with no temperature fallback,
+# so a chunk greedy decoding gets wrong stays wrong; pick "Best" for hard audio
+QUALITY_BEAM_SIZES = {"Fast": 1, "Balanced": 3, "Best": 5}
+QUALITY = "Fast"
 DEVICE = "auto"
 COMPUTE_TYPE = "auto"
-MEDIA_EXTENSIONS = {
+# Choices offered in Settings; "auto" resolves through _resolve_compute_type()
+COMPUTE_TYPES = ("auto", "int8", "int8_float16", "float16", "float32")
+# Where downloaded model weights live: the shared Hugging Face hub cache
+# (honours HF_HOME / HF_HUB_CACHE), so other tools' downloads are reused
+MODEL_CACHE_DIR = Path(HF_HUB_CACHE)
+# Write buffer for transcript files, in bytes
+TRANSCRIPT_BUFFER_SIZE = 1 << 20
+# Row id of the "No files added" line shown while the queue list is empty
+QUEUE_PLACEHOLDER = "placeholder"
+# Lowercase only; compare against path.suffix.lower()
+MEDIA_EXTENSIONS = frozenset({
     ".mp4", ".mov", ".avi", ".mkv", ".webm",
-    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus",
-    ".MP4", ".MOV", ".AVI", ".MKV", ".WEBM",
-    ".MP3", ".WAV", ".M4A", ".FLAC", ".OGG", ".AAC", ".WMA", ".OPUS"
-}
+    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus"
+})
+# File dialog filter; the dialog matches case-sensitively on some platforms
+MEDIA_FILETYPES = (
+    ("Media Files", " ".join(f"*{ext} *{ext.upper()}" for ext in sorted(MEDIA_EXTENSIONS))),
+    ("All Files", "*.*"),
+)
 
 # macOS System Colors (HIG-compliant)
 COLORS = {
@@ -123,21 +259,17 @@ class MacButton(tk.Frame):
             self.configure(bg=disabled_bg)
             self.label.configure(fg=disabled_fg, bg=disabled_bg)
 
-        if state == 'normal':
-            self.bind('<Button-1>', lambda e: self._on_click())
-            self.label.bind('<Button-1>', lambda e: self._on_click())
-            self.bind('<Enter>', self._on_enter)
-            self.bind('<Leave>', self._on_leave)
-            self.label.bind('<Enter>', self._on_enter)
-            self.label.bind('<Leave>', self._on_leave)
+        # Bound once for good; the handlers ignore events while disabled
+        self.bind('<Button-1>', lambda e: self._on_click())
+        self.label.bind('<Button-1>', lambda e: self._on_click())
+        self.bind('<Enter>', self._on_enter)
+        self.bind('<Leave>', self._on_leave)
+        self.label.bind('<Enter>', self._on_enter)
+        self.label.bind('<Leave>', self._on_leave)
 
     def _on_click(self):
-        print(f"DEBUG: Button clicked! State: {self.state}, Text: {self.label.cget('text')}")
         if self.state == 'normal' and self.command:
-            print("DEBUG: Calling command...")
             self.command()
-        else:
-            print(f"DEBUG: Button is disabled or has no command")
 
     def _on_enter(self, event):
         if self.state == 'normal':
@@ -162,23 +294,9 @@ class MacButton(tk.Frame):
                     disabled_fg = '#8E8E93'
                 self.configure(cursor='arrow', bg=disabled_bg)
                 self.label.configure(cursor='arrow', fg=disabled_fg, bg=disabled_bg)
-                # Remove event bindings when disabled
-                self.unbind('<Button-1>')
-                self.label.unbind('<Button-1>')
-                self.unbind('<Enter>')
-                self.unbind('<Leave>')
-                self.label.unbind('<Enter>')
-                self.label.unbind('<Leave>')
             else:
                 self.configure(cursor='hand2', bg=self.bg_color)
                 self.label.configure(cursor='hand2', fg=self.fg_color, bg=self.bg_color)
-                # Add event bindings when enabled
-                self.bind('<Button-1>', lambda e: self._on_click())
-                self.label.bind('<Button-1>', lambda e: self._on_click())
-                self.bind('<Enter>', self._on_enter)
-                self.bind('<Leave>', self._on_leave)
-                self.label.bind('<Enter>', self._on_enter)
-                self.label.bind('<Leave>', self._on_leave)
 
 
 class TranscriptionApp:
@@ -191,15 +309,25 @@ class TranscriptionApp:
         self.root.minsize(650, 700)  # Minimum size for usability
         self.root.resizable(True, True)  # Enable corner resizing
 
+        # Whisper stays loaded between runs; see _ensure_model()
         self.model = None
+        # (cpu_threads, num_workers, compute_type) the model was loaded with
+        self._model_settings = None
+        # Files transcribed side by side in the current run (see process_files)
+        self._parallel_workers = 1
+        self.model_lock = threading.Lock()
         self.output_folder = None
-        self.file_queue = []
+        # Insertion-ordered set of queued files: resolved path string -> Path
+        self.file_queue = {}
         self.is_processing = False
         self.remember_folder = BooleanVar()
 
         # Performance settings
         self.cpu_cores = multiprocessing.cpu_count()
         self.cpu_threads = IntVar(value=self.cpu_cores)  # Use all cores by default
+        self.compute_type = StringVar(value=COMPUTE_TYPE)  # One of COMPUTE_TYPES
+        self.batch_size = IntVar(value=BATCH_SIZE)
+        self.quality = StringVar(value=QUALITY)  # A QUALITY_BEAM_SIZES key
 
         # Output format settings
         self.output_format = StringVar(value="with_timestamps")  # "with_timestamps" or "plain_text"
@@ -214,12 +342,16 @@ class TranscriptionApp:
         self.use_wavlm = BooleanVar(value=True)  # Use WavLM by default (doesn't need token)
         self.num_speakers = IntVar(value=0)  # 0 = auto-detect
         self.diarization_pipeline = None
+        # Run pyannote alongside Whisper instead of after it (see process_files)
+        self._overlap_diarization = False
 
-        # Progress tracking (thread-safe)
-        self.progress_lock = threading.Lock()
+        # Progress tracking, written by the transcription thread and drawn
+        # through _set_progress()
         self.current_progress = 0.0  # 0-100
         self.processed_segments = 0
         self.total_segments_estimate = 0
+        # Whole percent last scheduled for display (-1 = none yet)
+        self._shown_percent = -1
 
         # Selected file tracking
         self.selected_file_index = None
@@ -227,15 +359,21 @@ class TranscriptionApp:
         # Stop flag for canceling transcription
         self.stop_requested = False
 
+        # Pending debounced config write (Tk after id), see save_config()
+        self._save_after = None
+
         # Load saved configuration
         self.load_config()
 
+        # One Tcl command shared by every settings widget that saves on change,
+        # rather than a separate registration per widget
+        self._save_cmd = self.root.register(self.save_config)
+
         self.setup_ui()
 
         # Set default folder if saved
         if self.output_folder:
-            display_path = self.output_folder if len(self.output_folder) < 50 else "…" + self.output_folder[-47:]
-            self.folder_var.set(display_path)
+            self.folder_var.set(self._short(self.output_folder))
             self.update_start_button()
 
         # Auto-save settings when they change (after initial load)
@@ -243,6 +381,9 @@ class TranscriptionApp:
         self.hf_token.trace_add('write', lambda *args: self.save_config())
         self.num_speakers.trace_add('write', lambda *args: self.save_config())
 
+        # Flush a pending config write before the window goes away
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
+
     def setup_ui(self):
         # Add menu bar
         menubar = tk.Menu(self.root)
@@ -345,7 +486,7 @@ class TranscriptionApp:
                                      activeforeground=COLORS['text_primary'],
                                      selectcolor=COLORS['secondary_bg'],
                                      highlightthickness=0,
-                                     command=self.save_config)
+                                     command=self._save_cmd)
         remember_check.pack(anchor='w', padx=12, pady=6)
 
         # Drop zone
@@ -408,24 +549,18 @@ class TranscriptionApp:
         scrollbar = Scrollbar(list_container)
         scrollbar.pack(side='right', fill='y')
 
-        self.file_listbox = Text(list_container,
-                                height=3,
-                                font=('SF Pro Text', 11),
-                                bg=COLORS['control_bg'],
-                                fg=COLORS['text_primary'],
-                                relief='solid',
-                                borderwidth=1,
-                                padx=10,
-                                pady=6,
-                                yscrollcommand=scrollbar.set,
-                                state='disabled',
-                                wrap='word',
-                                cursor='arrow')
+        # One row per queued file; each row's iid is the file's file_queue key
+        self.file_listbox = ttk.Treeview(list_container,
+                                         style="Queue.Treeview",
+                                         show='tree',
+                                         height=3,
+                                         selectmode='browse',
+                                         yscrollcommand=scrollbar.set)
         self.file_listbox.pack(side='left', fill='both', expand=True)
         scrollbar.config(command=self.file_listbox.yview)
 
-        # Bind click event for file selection
-        self.file_listbox.bind('<Button-1>', self.on_file_click)
+        # Selecting a row selects that file
+        self.file_listbox.bind('<<TreeviewSelect>>', self.on_file_click)
 
         # Remove selected file button
         self.remove_btn = MacButton(parent, text="Remove Selected",
@@ -456,6 +591,17 @@ class TranscriptionApp:
                        borderwidth=0,
                        thickness=6)
 
+        # Queue list rows (the Treeview above picks this up once configured)
+        style.configure("Queue.Treeview",
+                       font=('SF Pro Text', 11),
+                       background=COLORS['control_bg'],
+                       fieldbackground=COLORS['control_bg'],
+                       foreground=COLORS['text_primary'],
+                       rowheight=22)
+        style.map("Queue.Treeview",
+                  background=[('selected', COLORS['accent'])],
+                  foreground=[('selected', 'white')])
+
         self.progress = ttk.Progressbar(parent,
                                        mode='determinate',
                                        style="Mac.Horizontal.TProgressbar")
@@ -504,7 +650,7 @@ class TranscriptionApp:
         cpu_frame.pack(fill='x', padx=12, pady=(12, 8))
 
         Label(cpu_frame,
-              text=f"CPU Threads (1-{self.cpu_cores})",
+              text=f"CPU Threads per File (1-{self.cpu_cores})",
               font=('SF Pro Text', 12),
               bg=COLORS['secondary_bg'],
               fg=COLORS['text_primary']).pack(side='left')
@@ -514,15 +660,71 @@ class TranscriptionApp:
                                   to=self.cpu_cores,
                                   textvariable=self.cpu_threads,
                                   width=10,
-                                  command=self.save_config)
+                                  command=self._save_cmd)
         cpu_spinbox.pack(side='right')
 
+        # Weight precision setting
+        compute_frame = Frame(perf_well, bg=COLORS['secondary_bg'])
+        compute_frame.pack(fill='x', padx=12, pady=(0, 8))
+
+        Label(compute_frame,
+              text="Precision",
+              font=('SF Pro Text', 12),
+              bg=COLORS['secondary_bg'],
+              fg=COLORS['text_primary']).pack(side='left')
+
+        compute_combo = ttk.Combobox(compute_frame,
+                                     values=COMPUTE_TYPES,
+                                     textvariable=self.compute_type,
+                                     state='readonly',
+                                     width=12)
+        compute_combo.pack(side='right')
+        compute_combo.bind('<<ComboboxSelected>>', self._save_cmd)
+
+        # Batch size setting
+        batch_frame = Frame(perf_well, bg=COLORS['secondary_bg'])
+        batch_frame.pack(fill='x', padx=12, pady=(0, 8))
+
+        Label(batch_frame,
+              text=f"Batch Size (1-{MAX_BATCH_SIZE})",
+              font=('SF Pro Text', 12),
+              bg=COLORS['secondary_bg'],
+              fg=COLORS['text_primary']).pack(side='left')
+
+        batch_spinbox = ttk.Spinbox(batch_frame,
+                                    from_=1,
+                                    to=MAX_BATCH_SIZE,
+                                    textvariable=self.batch_size,
+                                    width=10,
+                                    command=self._save_cmd)
+        batch_spinbox.pack(side='right')
+
+        # Decoding quality setting
+        quality_frame = Frame(perf_well, bg=COLORS['secondary_bg'])
+        quality_frame.pack(fill='x', padx=12, pady=(0, 8))
+
+        Label(quality_frame,
+              text="Quality",
+              font=('SF Pro Text', 12),
+              bg=COLORS['secondary_bg'],
+              fg=COLORS['text_primary']).pack(side='left')
+
+        quality_combo = ttk.Combobox(quality_frame,
+                                     values=tuple(QUALITY_BEAM_SIZES),
+                                     textvariable=self.quality,
+                                     state='readonly',
+                                     width=12)
+        quality_combo.pack(side='right')
+        quality_combo.bind('<<ComboboxSelected>>', self._save_cmd)
+
         # Performance info label
         perf_info = Label(perf_well,
-                         text="Higher values use more CPU but may speed up transcription",
+                         text="On the CPU, queued files run side by side using all cores:\n"
+                              f"{self.cpu_cores} ÷ threads per file at a time. Lower values run more files at once.",
                          font=('SF Pro Text', 10),
                          bg=COLORS['secondary_bg'],
-                         fg=COLORS['text_tertiary'])
+                         fg=COLORS['text_tertiary'],
+                         justify='left')
         perf_info.pack(anchor='w', padx=12, pady=(0, 12))
 
         # Output Format section
@@ -551,7 +753,7 @@ class TranscriptionApp:
                    activeforeground=COLORS['text_primary'],
                    selectcolor=COLORS['secondary_bg'],
                    highlightthickness=0,
-                   command=self.save_config)
+                   command=self._save_cmd)
         self.radio_timestamp.pack(anchor='w', padx=12, pady=(12, 6))
 
         self.radio_plaintext = Radiobutton(output_well,
@@ -565,7 +767,7 @@ class TranscriptionApp:
                    activeforeground=COLORS['text_primary'],
                    selectcolor=COLORS['secondary_bg'],
                    highlightthickness=0,
-                   command=self.save_config)
+                   command=self._save_cmd)
         self.radio_plaintext.pack(anchor='w', padx=12, pady=(0, 12))
 
         # Speaker Diarization section (if available)
@@ -668,7 +870,7 @@ class TranscriptionApp:
                                           to=10,
                                           textvariable=self.num_speakers,
                                           width=10,
-                                          command=self.save_config)
+                                          command=self._save_cmd)
             speaker_spinbox.pack(side='left', padx=(8, 0))
 
             # Diarization info
@@ -688,6 +890,9 @@ class TranscriptionApp:
                     self.output_folder = config.get('output_folder')
                     self.remember_folder.set(config.get('remember_folder', False))
                     self.cpu_threads.set(config.get('cpu_threads', self.cpu_cores))
+                    self.compute_type.set(config.get('compute_type', COMPUTE_TYPE))
+                    self.batch_size.set(config.get('batch_size', BATCH_SIZE))
+                    self.quality.set(config.get('quality', QUALITY))
                     self.output_format.set(config.get('output_format', 'with_timestamps'))
                     self.enable_diarization.set(config.get('enable_diarization', False))
                     self.hf_token.set(config.get('hf_token', ''))
@@ -696,7 +901,21 @@ class TranscriptionApp:
             print(f"Could not load config: {e}")
 
     def save_config(self):
+        """Schedule a config write, coalescing rapid setting changes into one"""
+        if self._save_after is not None:
+            self.root.after_cancel(self._save_after)
+        self._save_after = self.root.after(CONFIG_SAVE_DELAY_MS, self._save_config_now)
+
+    def on_close(self):
+        """Write any pending config change, then close the window"""
+        if self._save_after is not None:
+            self.root.after_cancel(self._save_after)
+            self._save_config_now()
+        self.root.destroy()
+
+    def _save_config_now(self):
         """Save configuration to file"""
+        self._save_after = None
         try:
             diarization_val = self.enable_diarization.get()
             token_val = self.hf_token.get()
@@ -706,14 +925,21 @@ class TranscriptionApp:
                 'output_folder': self.output_folder if self.remember_folder.get() else None,
                 'remember_folder': self.remember_folder.get(),
                 'cpu_threads': self.cpu_threads.get(),
+                'compute_type': self.compute_type.get(),
+                'batch_size': self.batch_size.get(),
+                'quality': self.quality.get(),
                 'output_format': self.output_format.get(),
                 'enable_diarization': diarization_val,
                 'hf_token': token_val,
                 'num_speakers': self.num_speakers.get()
             }
             print(f"DEBUG: Saving config - diarization={config['enable_diarization']}, token_length={len(config['hf_token'])}")
-            with open(CONFIG_FILE, 'w') as f:
+            # Write a sibling temp file and rename over the config, so a crash
+            # mid-write never leaves a truncated file behind
+            tmp_file = CONFIG_FILE.with_suffix('.tmp')
+            with open(tmp_file, 'w') as f:
                 json.dump(config, f)
+            os.replace(tmp_file, CONFIG_FILE)
         except Exception as e:
             print(f"Could not save config: {e}")
 
@@ -741,7 +967,8 @@ class TranscriptionApp:
             "AI Models:\n"
             f"• OpenAI Whisper ({MODEL_SIZE})\n"
             f"• Device: {DEVICE}\n"
-            f"• Compute: {COMPUTE_TYPE}"
+            f"• Compute: {self.compute_type.get()}\n"
+            f"• Model cache: {MODEL_CACHE_DIR}"
             f"{diarization_info}\n"
             "All processing happens locally on your computer.\n"
             "No data is sent to external services.\n\n"
@@ -749,6 +976,11 @@ class TranscriptionApp:
         )
         messagebox.showinfo("About Transcribe Anything", about_text)
 
+    @staticmethod
+    def _short(path, limit=50):
+        """Shorten a path for display, keeping its tail behind an ellipsis"""
+        return path if len(path) < limit else "…" + path[-(limit - 3):]
+
     def choose_output_folder(self):
         # Default to user's home directory, or saved folder if available
         initial_dir = self.output_folder if self.output_folder else str(Path.home())
@@ -760,18 +992,14 @@ class TranscriptionApp:
 
         if folder:
             self.output_folder = folder
-            display_path = folder if len(folder) < 50 else "…" + folder[-47:]
-            self.folder_var.set(display_path)
+            self.folder_var.set(self._short(folder))
             self.save_config()
             self.update_start_button()
 
     def add_files(self):
         files = filedialog.askopenfilenames(
             title="Select Audio or Video Files",
-            filetypes=[
-                ("Media Files", " ".join(f"*{ext}" for ext in MEDIA_EXTENSIONS)),
-                ("All Files", "*.*")
-            ]
+            filetypes=MEDIA_FILETYPES
         )
         if files:
             self.add_files_to_queue(files)
@@ -781,40 +1009,80 @@ class TranscriptionApp:
         self.add_files_to_queue(files)
 
     def add_files_to_queue(self, files):
+        """
+        Queue existing files with a media extension (case-insensitive), skipping duplicates.
+        A dropped folder queues the media files directly inside it.
+        """
+        added = []
+        # Paths arrive clean: on_drop unwraps Tcl's {braced} names with
+        # splitlist, and the file dialog returns plain strings
         for file_path in files:
-            file_path = file_path.strip('{}')
             path = Path(file_path)
-            if path.is_file() and path.suffix in MEDIA_EXTENSIONS:
-                if path not in self.file_queue:
-                    self.file_queue.append(path)
-
-        self.update_file_list()
+            if path.suffix.lower() in MEDIA_EXTENSIONS:
+                if path.is_file():
+                    # Keyed by resolved path, so the same file via another route is a duplicate
+                    self._queue_path(os.fspath(path.resolve()), path, added)
+            elif path.is_dir():
+                # One scandir per folder; DirEntry caches the file type, so
+                # only symlinks cost a stat
+                folder = path.resolve()
+                try:
+                    with os.scandir(folder) as entries:
+                        for entry in sorted(entries, key=lambda e: e.name):
+                            if (os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS
+                                    and entry.is_file()):
+                                entry_path = Path(entry.path)
+                                key = os.fspath(entry_path.resolve()) if entry.is_symlink() else entry.path
+                                self._queue_path(key, entry_path, added)
+                except OSError as e:
+                    # An unreadable folder is skipped; the rest of the drop still queues
+                    print(f"Could not read folder {folder}: {e}")
+                    self.status_var.set(f"Skipped {path.name}: {e.strerror or e}")
+
+        if added:
+            self._append_to_list(added)
         self.update_start_button()
 
-    def update_file_list(self):
-        self.file_listbox.config(state='normal')
-        self.file_listbox.delete(1.0, 'end')
+    def _queue_path(self, key, path, added):
+        """Queue path under key unless it's already queued, recording it in added"""
+        if key not in self.file_queue:
+            self.file_queue[key] = path
+            added.append((key, path))
 
-        # Clear any existing tags
-        self.file_listbox.tag_delete('selected')
+    def update_file_list(self):
+        """Redraw the whole file list from the queue"""
+        self.file_listbox.delete(*self.file_listbox.get_children())
 
         if self.file_queue:
-            for i, file_path in enumerate(self.file_queue, 1):
-                line_start = self.file_listbox.index('end-1c')
-                self.file_listbox.insert('end', f"{i}. {file_path.name}\n")
-                line_end = self.file_listbox.index('end-1c')
-
-                # Highlight selected file
-                if self.selected_file_index == i - 1:
-                    self.file_listbox.tag_add('selected', line_start, line_end)
-                    self.file_listbox.tag_config('selected', background=COLORS['accent'], foreground='white')
+            self._append_to_list(self.file_queue.items())
+            if self.selected_file_index is not None:
+                self.file_listbox.selection_set(
+                    self.file_listbox.get_children()[self.selected_file_index])
         else:
-            self.file_listbox.insert('end', "No files added")
+            self.file_listbox.insert('', 'end', iid=QUEUE_PLACEHOLDER, text="No files added")
             self.selected_file_index = None
 
-        self.file_listbox.config(state='disabled')
         self.update_remove_button()
 
+    def _append_to_list(self, items):
+        """Add rows for newly queued (key, path) pairs below the existing ones"""
+        if self.file_listbox.exists(QUEUE_PLACEHOLDER):
+            self.file_listbox.delete(QUEUE_PLACEHOLDER)
+
+        for i, (key, file_path) in enumerate(items, len(self.file_listbox.get_children()) + 1):
+            self.file_listbox.insert('', 'end', iid=key, text=f"{i}. {file_path.name}")
+
+    def _remove_from_list(self, key, index):
+        """Delete one file's row and renumber the rows after it"""
+        self.file_listbox.delete(key)
+
+        rows = self.file_listbox.get_children()
+        for i in range(index, len(rows)):
+            self.file_listbox.item(rows[i], text=f"{i + 1}. {self.file_queue[rows[i]].name}")
+
+        if not rows:
+            self.file_listbox.insert('', 'end', iid=QUEUE_PLACEHOLDER, text="No files added")
+
     def update_remove_button(self):
         """Enable/disable remove button based on selection and processing state"""
         if self.selected_file_index is not None and not self.is_processing:
@@ -823,33 +1091,29 @@ class TranscriptionApp:
             self.remove_btn.config(state='disabled')
 
     def on_file_click(self, event):
-        """Handle click on file list to select a file"""
-        if not self.file_queue or self.is_processing:
+        """Handle a row selection in the file list"""
+        selection = self.file_listbox.selection()
+        if self.is_processing or not selection or selection[0] not in self.file_queue:
             return
 
-        # Get the line number that was clicked
-        index = self.file_listbox.index(f"@{event.x},{event.y}")
-        line_num = int(index.split('.')[0])
-
-        # Convert line number to file index (0-based)
-        file_index = line_num - 1
-
-        if 0 <= file_index < len(self.file_queue):
-            self.selected_file_index = file_index
-            self.update_file_list()
+        self.selected_file_index = self.file_listbox.index(selection[0])
+        self.update_remove_button()
 
     def remove_selected_file(self):
         """Remove the selected file from the queue"""
         if self.selected_file_index is not None and not self.is_processing:
             if 0 <= self.selected_file_index < len(self.file_queue):
-                removed_file = self.file_queue.pop(self.selected_file_index)
+                removed_index = self.selected_file_index
+                removed_key = list(self.file_queue)[removed_index]
+                removed_file = self.file_queue.pop(removed_key)
                 print(f"Removed file from queue: {removed_file.name}")
 
                 # Clear selection
                 self.selected_file_index = None
 
                 # Update UI
-                self.update_file_list()
+                self._remove_from_list(removed_key, removed_index)
+                self.update_remove_button()
                 self.update_start_button()
 
     def update_start_button(self):
@@ -866,6 +1130,9 @@ class TranscriptionApp:
         # Get values from tkinter variables BEFORE starting thread
         # (tkinter variables can only be accessed from main thread)
         cpu_threads = self.cpu_threads.get()
+        compute_type = self.compute_type.get()
+        batch_size = self.batch_size.get()
+        beam_size = QUALITY_BEAM_SIZES.get(self.quality.get(), QUALITY_BEAM_SIZES[QUALITY])
         output_format = self.output_format.get()
         enable_diarization = self.enable_diarization.get()
         hf_token = self.hf_token.get()
@@ -873,6 +1140,9 @@ class TranscriptionApp:
         use_wavlm = self.use_wavlm.get()
 
         print(f"DEBUG: CPU Threads: {cpu_threads}")
+        print(f"DEBUG: Compute type: {compute_type}")
+        print(f"DEBUG: Batch size: {batch_size}")
+        print(f"DEBUG: Beam size: {beam_size}")
         print(f"DEBUG: Output format: {output_format}")
         print(f"DEBUG: Diarization enabled: {enable_diarization}")
         print(f"DEBUG: HF Token: '{hf_token}' (length: {len(hf_token)})")
@@ -893,15 +1163,16 @@ class TranscriptionApp:
         self.progress.config(mode='determinate', value=0)
 
         # Reset progress tracking variables to prevent showing stale values
-        with self.progress_lock:
-            self.current_progress = 0.0
-            self.processed_segments = 0
-            self.total_segments_estimate = 0
+        self.current_progress = 0.0
+        self.processed_segments = 0
+        self.total_segments_estimate = 0
+        self._shown_percent = -1
 
         # Pass the values to the thread
         thread = threading.Thread(
             target=self.process_files,
-            args=(cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm),
+            args=(cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm,
+                  compute_type, batch_size, beam_size),
             daemon=True
         )
         thread.start()
@@ -913,35 +1184,48 @@ class TranscriptionApp:
         self.status_var.set("Stopping transcription (may take 30-60 seconds)...")
         self.stop_button.config(state='disabled')
 
-    def process_files(self, cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm):
+    def process_files(self, cpu_threads, output_format, enable_diarization, hf_token, num_speakers, use_wavlm,
+                      compute_type=COMPUTE_TYPE, batch_size=BATCH_SIZE,
+                      beam_size=QUALITY_BEAM_SIZES[QUALITY]):
         print("DEBUG: process_files() started")
         try:
             # Store parameters as instance attributes so transcribe_file() can access them
             self._cpu_threads = cpu_threads
+            self._batch_size = batch_size
+            self._beam_size = beam_size
             self._use_wavlm = use_wavlm
             self._output_format = output_format
             self._enable_diarization = enable_diarization
             self._hf_token = hf_token
             self._num_speakers = num_speakers
 
-            # Initialize model with user-configured CPU threads
-            print(f"DEBUG: Initializing model with {cpu_threads} CPU threads")
-            self.model = WhisperModel(
-                MODEL_SIZE,
-                device=DEVICE,
-                compute_type=COMPUTE_TYPE,
-                cpu_threads=cpu_threads
-            )
+            # Run independent files side by side when the thread setting leaves
+            # cores idle; CTranslate2 gives each its own worker over shared weights,
+            # and transcribe_file wraps the model in a pipeline of its own per file.
+            # On a GPU the files would only contend for it, so batching alone is used
+            files = list(self.file_queue.values())
+            if ctranslate2.get_cuda_device_count() > 0:
+                workers = 1
+            else:
+                workers = max(1, min(len(files), self.cpu_cores // max(1, cpu_threads)))
+            self._parallel_workers = workers
+
+            # Load the model on the first run, or when the thread/worker counts
+            # or precision changed
+            self._ensure_model(cpu_threads, workers, compute_type)
 
-            # Initialize diarization models if enabled
+            # Initialize diarization models if enabled (loaded on the first run
+            # that needs them, then reused)
             if enable_diarization:
+                self.wavlm_feature_extractor = None
+                self.wavlm_model = None
+
                 # Try WavLM first (doesn't require HF token)
                 if HAS_WAVLM and self._use_wavlm:
                     try:
                         print("Initializing WavLM speaker diarization...")
                         self.root.after(0, lambda: self.status_var.set("Loading WavLM models..."))
-                        self.wavlm_feature_extractor = Wav2Vec2FeatureExtractor.from_pretrained('microsoft/wavlm-base-plus-sv')
-                        self.wavlm_model = WavLMForXVector.from_pretrained('microsoft/wavlm-base-plus-sv')
+                        self.wavlm_feature_extractor, self.wavlm_model = _get_wavlm()
                         print("WavLM models loaded successfully")
                     except Exception as e:
                         error_msg = str(e)[:50]
@@ -955,10 +1239,7 @@ class TranscriptionApp:
                     try:
                         print("Initializing pyannote speaker diarization pipeline...")
                         self.root.after(0, lambda: self.status_var.set("Loading speaker diarization model..."))
-                        self.diarization_pipeline = Pipeline.from_pretrained(
-                            "pyannote/speaker-diarization-3.1",
-                            token=hf_token
-                        )
+                        self.diarization_pipeline = _get_pyannote(hf_token)
                         print("Diarization pipeline loaded successfully")
                     except Exception as e:
                         error_msg = str(e)[:50]
@@ -972,6 +1253,11 @@ class TranscriptionApp:
                 self.wavlm_model = None
                 self.diarization_pipeline = None
 
+            # pyannote only needs the audio, not Whisper's words, so it can run
+            # while Whisper decodes, unless both would share the CPU
+            self._overlap_diarization = self.diarization_pipeline is not None and (
+                ctranslate2.get_cuda_device_count() > 0 or _torch_device().type != 'cpu')
+
             # Switch to determinate progress mode
             self.root.after(0, lambda: self.progress.stop())
             self.root.after(0, lambda: self.progress.config(mode='determinate', value=0))
@@ -980,29 +1266,37 @@ class TranscriptionApp:
                 models_loaded += " + Speaker Diarization"
             self.root.after(0, lambda msg=models_loaded: self.status_var.set(msg))
 
-            # Start polling progress from main thread
-            self.root.after(100, self.poll_progress)
-
-            total_files = len(self.file_queue)
-            for i, file_path in enumerate(self.file_queue, 1):
-                # Check if stop was requested
-                if self.stop_requested:
-                    print("Transcription stopped by user")
-                    break
-
-                # Update status
-                self.root.after(0, lambda f=file_path, idx=i, total=total_files:
-                              self.status_var.set(f"Transcribing {idx} of {total}: {f.name}"))
-
-                # Update progress bar - show progress based on file completion
-                progress_percent = int(((i - 1) / total_files) * 100)
-                self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
-
-                self.transcribe_file(file_path)
-
-                # Update progress after file completes
-                progress_percent = int((i / total_files) * 100)
-                self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
+            if workers > 1:
+                self._transcribe_parallel(files, workers)
+            else:
+                total_files = len(files)
+                # Decode the next file while the current one transcribes, so
+                # ffmpeg never holds up the model; at most one decoded file waits
+                with concurrent.futures.ThreadPoolExecutor(max_workers=1) as decoder:
+                    next_audio = decoder.submit(decode_audio, str(files[0]), sampling_rate=SAMPLE_RATE)
+                    for i, file_path in enumerate(files, 1):
+                        # Check if stop was requested
+                        if self.stop_requested:
+                            print("Transcription stopped by user")
+                            next_audio.cancel()
+                            break
+
+                        # Update status
+                        self.root.after(0, lambda f=file_path, idx=i, total=total_files:
+                                      self.status_var.set(f"Transcribing {idx} of {total}: {f.name}"))
+
+                        # Update progress bar - show progress based on file completion
+                        progress_percent = int(((i - 1) / total_files) * 100)
+                        self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
+
+                        audio = next_audio
+                        if i < total_files:
+                            next_audio = decoder.submit(decode_audio, str(files[i]), sampling_rate=SAMPLE_RATE)
+                        self.transcribe_file(file_path, audio)
+
+                        # Update progress after file completes
+                        progress_percent = int((i / total_files) * 100)
+                        self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
 
             self.root.after(0, self.transcription_complete)
 
@@ -1015,16 +1309,80 @@ class TranscriptionApp:
             self.root.after(0, lambda: self.progress.config(mode='determinate', value=0))
             self.is_processing = False
 
-    def transcribe_file(self, file_path):
+    def _ensure_model(self, cpu_threads, num_workers=1, compute_type=COMPUTE_TYPE):
+        """
+        Load the Whisper model once and keep it for later runs.
+
+        The model is only reloaded when cpu_threads, num_workers or the
+        resolved compute_type differ from what it was loaded with.
+        """
+        settings = (cpu_threads, num_workers, _resolve_compute_type(compute_type))
+        with self.model_lock:
+            if self.model is not None and self._model_settings == settings:
+                return
+            print(f"DEBUG: Initializing {settings[2]} model with {cpu_threads} CPU threads, {num_workers} worker(s)")
+            self.model = WhisperModel(
+                MODEL_SIZE,
+                device=DEVICE,
+                compute_type=settings[2],
+                cpu_threads=cpu_threads,
+                num_workers=num_workers,
+                download_root=str(MODEL_CACHE_DIR)
+            )
+            self._model_settings = settings
+
+    def _transcribe_parallel(self, files, workers):
+        """Transcribe files concurrently on the shared model, reporting each one as it finishes"""
+        total_files = len(files)
+        self.root.after(0, lambda: self.status_var.set(
+            f"Transcribing {total_files} files, {workers} at a time…"))
+
+        def run(file_path):
+            # Files still waiting when Stop is pressed are skipped
+            if self.stop_requested:
+                return False
+            return self.transcribe_file(file_path)
+
+        # Longest files first, so a long file picked up last doesn't leave the
+        # other workers idle while it finishes alone
+        files = sorted(files, key=_media_duration, reverse=True)
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(run, file_path) for file_path in files]
+            for done, _ in enumerate(concurrent.futures.as_completed(futures), 1):
+                progress_percent = int((done / total_files) * 100)
+                self.root.after(0, lambda p=progress_percent: self.progress.config(value=p))
+                self.root.after(0, lambda d=done: self.status_var.set(
+                    f"Transcribed {d} of {total_files} files"))
+
+    def transcribe_file(self, file_path, audio_future=None):
+        """Transcribe one file; audio_future, if given, is its decode already under way"""
         try:
             print(f"Starting transcription of: {file_path}")
             output_file = Path(self.output_folder) / f"{file_path.stem}.txt"
             print(f"Output file will be: {output_file}")
 
-            segments, info = self.model.transcribe(
-                str(file_path),
+            # Decode once to 16 kHz mono; Whisper and both diarizers share the array
+            if audio_future is not None:
+                audio = audio_future.result()
+            else:
+                audio = decode_audio(str(file_path), sampling_rate=SAMPLE_RATE)
+
+            diarization_future = None
+            if self._overlap_diarization:
+                executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+                diarization_future = executor.submit(self._run_pyannote, audio)
+                executor.shutdown(wait=False)
+
+            # Decode several VAD chunks per model call. The pipeline keeps
+            # per-run word timestamp state, so each file gets its own wrapper
+            # around the shared model.
+            batched_model = BatchedInferencePipeline(model=self.model)
+            segments, info = batched_model.transcribe(
+                audio,
                 language=None,
-                beam_size=5,
+                batch_size=self._batch_size,
+                beam_size=self._beam_size,
                 vad_filter=True,
                 vad_parameters=dict(min_silence_duration_ms=100),
                 word_timestamps=True
@@ -1033,9 +1391,8 @@ class TranscriptionApp:
             print(f"Transcription started. Language: {info.language}, Duration: {info.duration:.2f}s")
 
             # Reset progress tracking
-            with self.progress_lock:
-                self.current_progress = 0.0
-                self.processed_segments = 0
+            self.processed_segments = 0
+            self._set_progress(0.0)
 
             # Process segments one by one with progress updates
             segments_list = []
@@ -1052,14 +1409,12 @@ class TranscriptionApp:
                 last_end_time = segment.end
 
                 # Update progress based on time processed vs total duration
-                with self.progress_lock:
-                    self.processed_segments = len(segments_list)
-                    if total_duration > 0:
-                        self.current_progress = min(95.0, (last_end_time / total_duration) * 100)
+                self.processed_segments = len(segments_list)
+                if total_duration > 0:
+                    self._set_progress(min(95.0, (last_end_time / total_duration) * 100))
 
             # Set to 95% before writing file
-            with self.progress_lock:
-                self.current_progress = 95.0
+            self._set_progress(95.0)
 
             print(f"Got {len(segments_list)} segments")
 
@@ -1070,8 +1425,7 @@ class TranscriptionApp:
             if self.wavlm_model and self.wavlm_feature_extractor:
                 try:
                     print("Running WavLM speaker diarization...")
-                    with self.progress_lock:
-                        self.current_progress = 96.0
+                    self._set_progress(96.0)
 
                     # Collect all words from segments
                     all_words = []
@@ -1082,16 +1436,9 @@ class TranscriptionApp:
                     if len(all_words) > 0:
                         print(f"Extracting embeddings for {len(all_words)} words...")
 
-                        # Load audio
-                        import torchaudio
-                        waveform, sample_rate = torchaudio.load(str(file_path))
-
-                        # Resample if needed
-                        if sample_rate != 16000:
-                            print(f"Resampling from {sample_rate}Hz to 16000Hz...")
-                            resampler = torchaudio.transforms.Resample(sample_rate, 16000)
-                            waveform = resampler(waveform)
-                            sample_rate = 16000
+                        # Reuse the decoded audio as a (channels, samples) tensor
+                        waveform = torch.from_numpy(audio).unsqueeze(0)
+                        sample_rate = SAMPLE_RATE
 
                         # Use a sliding window approach to detect speaker changes
                         # Window size: 1.0 second, Stride: 0.5 seconds
@@ -1250,8 +1597,7 @@ class TranscriptionApp:
 
                         print(f"WavLM re-segmented into {len(segments_list)} speaker turns")
 
-                        with self.progress_lock:
-                            self.current_progress = 98.0
+                        self._set_progress(98.0)
 
                 except Exception as e:
                     print(f"WavLM diarization failed: {e}")
@@ -1263,119 +1609,83 @@ class TranscriptionApp:
             if not speaker_labels and self.diarization_pipeline:
                 try:
                     print("Running speaker diarization...")
-                    with self.progress_lock:
-                        self.current_progress = 96.0
+                    self._set_progress(96.0)
+
+                    if diarization_future is not None:
+                        diarization = diarization_future.result()
+                    else:
+                        diarization = self._run_pyannote(audio)
+
+                    print(f"Diarization complete. Re-segmenting based on speaker changes...")
+
+                    # Show what diarization detected
+                    print("\nDiarization detected speaker timeline:")
+                    speaker_turns = list(diarization.speaker_diarization.itertracks(yield_label=True))
+                    for turn, _, spk in speaker_turns:
+                        print(f"  {spk}: {turn.start:.2f}s - {turn.end:.2f}s")
+
+                    if len(speaker_turns) == 0:
+                        print("WARNING: No speakers detected by diarization model!")
+                    elif len(set(spk for _, _, spk in speaker_turns)) == 1:
+                        print("WARNING: Only 1 speaker detected - diarization may have failed")
+
+                    # Define SegmentWithSpeaker class
+                    class SegmentWithSpeaker:
+                        def __init__(self, text, start, end, speaker):
+                            self.text = text
+                            self.start = start
+                            self.end = end
+                            self.speaker = speaker
+
+                    # Re-segment using word-level timestamps matched to diarization
+                    new_segments = []
+                    speaker_at = _speaker_finder(speaker_turns)
 
-                    # Convert audio to WAV for diarization (pyannote works better with WAV)
-                    import tempfile
-                    import torchaudio
-
-                    # Load audio and convert to WAV
-                    waveform, sample_rate = torchaudio.load(str(file_path))
-
-                    # Create temp WAV file
-                    with tempfile.NamedTemporaryFile(suffix='.wav', delete=False) as tmp_wav:
-                        tmp_wav_path = tmp_wav.name
-                        torchaudio.save(tmp_wav_path, waveform, sample_rate)
-
-                    try:
-                        # Run diarization on WAV file
-                        num_speakers = self._num_speakers if self._num_speakers > 0 else None
-                        diarization = self.diarization_pipeline(
-                            tmp_wav_path,
-                            num_speakers=num_speakers
-                        )
-
-                        print(f"Diarization complete. Re-segmenting based on speaker changes...")
-
-                        # Show what diarization detected
-                        print("\nDiarization detected speaker timeline:")
-                        speaker_turns = list(diarization.speaker_diarization.itertracks(yield_label=True))
-                        for turn, _, spk in speaker_turns:
-                            print(f"  {spk}: {turn.start:.2f}s - {turn.end:.2f}s")
-
-                        if len(speaker_turns) == 0:
-                            print("WARNING: No speakers detected by diarization model!")
-                        elif len(set(spk for _, _, spk in speaker_turns)) == 1:
-                            print("WARNING: Only 1 speaker detected - diarization may have failed")
-
-                        # Define SegmentWithSpeaker class
-                        class SegmentWithSpeaker:
-                            def __init__(self, text, start, end, speaker):
-                                self.text = text
-                                self.start = start
-                                self.end = end
-                                self.speaker = speaker
+                    for segment in segments_list:
+                        if not hasattr(segment, 'words') or not segment.words:
+                            # No word timestamps, match whole segment to speaker
+                            speaker = speaker_at((segment.start + segment.end) / 2)
+                            new_segments.append(SegmentWithSpeaker(segment.text, segment.start, segment.end, speaker))
+                        else:
+                            # Has word timestamps - split on speaker changes
+                            current_speaker = None
+                            current_words = []
+                            current_start = segment.words[0].start
 
-                        # Re-segment using word-level timestamps matched to diarization
-                        new_segments = []
+                            for word in segment.words:
+                                word_speaker = speaker_at((word.start + word.end) / 2)
 
-                        for segment in segments_list:
-                            if not hasattr(segment, 'words') or not segment.words:
-                                # No word timestamps, match whole segment to speaker
-                                seg_mid = (segment.start + segment.end) / 2
-                                speaker = None
-                                for turn, _, spk in speaker_turns:
-                                    if turn.start <= seg_mid <= turn.end:
-                                        speaker = str(spk)
-                                        break
-                                new_segments.append(SegmentWithSpeaker(segment.text, segment.start, segment.end, speaker))
-                            else:
-                                # Has word timestamps - split on speaker changes
-                                current_speaker = None
-                                current_words = []
-                                current_start = segment.words[0].start
-
-                                for word in segment.words:
-                                    word_mid = (word.start + word.end) / 2
-                                    word_speaker = None
-
-                                    # Find speaker for this word
-                                    for turn, _, spk in speaker_turns:
-                                        if turn.start <= word_mid <= turn.end:
-                                            word_speaker = str(spk)
-                                            break
-
-                                    # Check if speaker changed
-                                    if word_speaker != current_speaker and current_words:
-                                        # Create segment for accumulated words
-                                        text = ' '.join([w.word.strip() for w in current_words])
-                                        end_time = current_words[-1].end
-                                        new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
-
-                                        # Start new segment
-                                        current_words = [word]
-                                        current_start = word.start
-                                        current_speaker = word_speaker
-                                    else:
-                                        # Same speaker, accumulate word
-                                        if not current_words:
-                                            current_speaker = word_speaker
-                                        current_words.append(word)
-
-                                # Add final segment
-                                if current_words:
+                                # Check if speaker changed
+                                if word_speaker != current_speaker and current_words:
+                                    # Create segment for accumulated words
                                     text = ' '.join([w.word.strip() for w in current_words])
                                     end_time = current_words[-1].end
                                     new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
 
-                        # Replace segments_list with re-segmented version
-                        segments_list = new_segments
-                        # Update speaker_labels to use segment index
-                        speaker_labels = {idx: seg.speaker for idx, seg in enumerate(segments_list) if seg.speaker}
+                                    # Start new segment
+                                    current_words = [word]
+                                    current_start = word.start
+                                    current_speaker = word_speaker
+                                else:
+                                    # Same speaker, accumulate word
+                                    if not current_words:
+                                        current_speaker = word_speaker
+                                    current_words.append(word)
+
+                            # Add final segment
+                            if current_words:
+                                text = ' '.join([w.word.strip() for w in current_words])
+                                end_time = current_words[-1].end
+                                new_segments.append(SegmentWithSpeaker(text, current_start, end_time, current_speaker))
 
-                        print(f"\nRe-segmented into {len(segments_list)} speaker turns based on diarization output")
+                    # Replace segments_list with re-segmented version
+                    segments_list = new_segments
+                    # Update speaker_labels to use segment index
+                    speaker_labels = {idx: seg.speaker for idx, seg in enumerate(segments_list) if seg.speaker}
 
-                        with self.progress_lock:
-                            self.current_progress = 98.0
+                    print(f"\nRe-segmented into {len(segments_list)} speaker turns based on diarization output")
 
-                    finally:
-                        # Clean up temp WAV file
-                        import os
-                        try:
-                            os.unlink(tmp_wav_path)
-                        except:
-                            pass
+                    self._set_progress(98.0)
 
                 except Exception as e:
                     print(f"Diarization failed: {e}")
@@ -1384,26 +1694,31 @@ class TranscriptionApp:
             # Write output based on selected format
             output_format = self._output_format
 
-            with open(output_file, 'w', encoding='utf-8') as f:
+            # A 1 MiB buffer means a whole transcript usually reaches the disk
+            # in one write() call, however many segments it has
+            with open(output_file, 'w', encoding='utf-8', buffering=TRANSCRIPT_BUFFER_SIZE) as f:
+                write = f.write
+
                 # Header (always included)
-                f.write(f"Transcript: {file_path.name}\n")
-                f.write(f"Language: {info.language}\n")
-                f.write(f"Duration: {info.duration:.2f} seconds\n")
-                f.write(f"{'-'*80}\n\n")
+                write(f"Transcript: {file_path.name}\n"
+                      f"Language: {info.language}\n"
+                      f"Duration: {info.duration:.2f} seconds\n"
+                      f"{'-'*80}\n\n")
 
                 if output_format == "with_timestamps":
                     # Format with timestamps (for subtitles)
+                    fmt = self.format_timestamp
                     for idx, segment in enumerate(segments_list):
-                        timestamp = f"[{self.format_timestamp(segment.start)} --> {self.format_timestamp(segment.end)}]"
+                        timestamp = f"[{fmt(segment.start)} --> {fmt(segment.end)}]"
                         speaker = speaker_labels.get(idx, "")
                         speaker_label = f"{speaker}: " if speaker else ""
-                        f.write(f"{timestamp}\n{speaker_label}{segment.text.strip()}\n\n")
+                        write(f"{timestamp}\n{speaker_label}{segment.text.strip()}\n\n")
                 else:
                     # Plain text format (conversational with speakers)
                     for idx, segment in enumerate(segments_list):
                         speaker = speaker_labels.get(idx, "")
                         speaker_label = f"{speaker}: " if speaker else ""
-                        f.write(f"{speaker_label}{segment.text.strip()}\n\n")
+                        write(f"{speaker_label}{segment.text.strip()}\n\n")
 
             print(f"Successfully wrote transcript to: {output_file}")
             return True
@@ -1416,31 +1731,46 @@ class TranscriptionApp:
             self.root.after(0, lambda: self.status_var.set(error_msg))
             return False
 
+    def _run_pyannote(self, audio):
+        """Diarize decoded 16 kHz audio, handing pyannote the array instead of a file"""
+        _load_torch_deps()
+        num_speakers = self._num_speakers if self._num_speakers > 0 else None
+        return self.diarization_pipeline(
+            {"waveform": torch.from_numpy(audio).unsqueeze(0), "sample_rate": SAMPLE_RATE},
+            num_speakers=num_speakers
+        )
+
     def format_timestamp(self, seconds):
-        hours = int(seconds // 3600)
-        minutes = int((seconds % 3600) // 60)
-        secs = int(seconds % 60)
+        minutes, secs = divmod(int(seconds), 60)
+        hours, minutes = divmod(minutes, 60)
         return f"{hours:02d}:{minutes:02d}:{secs:02d}"
 
-    def poll_progress(self):
-        """Poll progress from main thread and update UI"""
-        if self.is_processing:
-            with self.progress_lock:
-                progress_value = self.current_progress
-                segments_info = f" ({self.processed_segments} segments)" if self.processed_segments > 0 else ""
-
-            # Update progress bar
-            self.progress['value'] = progress_value
-
-            # Update status with percentage
-            if progress_value > 0:
-                self.status_var.set(f"Transcribing... {progress_value:.0f}%{segments_info}")
+    def _set_progress(self, percent):
+        """
+        Record the current file's progress from the transcription thread.
+
+        The UI is only asked to redraw when the whole percent changes, rather
+        than polled on a timer. Parallel runs share these counters, so they
+        report per finished file instead (see _transcribe_parallel).
+        """
+        self.current_progress = percent
+        if self._parallel_workers == 1 and int(percent) != self._shown_percent:
+            self._shown_percent = int(percent)
+            self.root.after(0, self._show_progress)
+
+    def _show_progress(self):
+        """Draw the latest progress on the main thread"""
+        if not self.is_processing:
+            return
+        progress_value = self.current_progress
+        segments_info = f" ({self.processed_segments} segments)" if self.processed_segments > 0 else ""
 
-            # Force UI update
-            self.progress.update_idletasks()
+        # Update progress bar
+        self.progress['value'] = progress_value
 
-            # Schedule next poll
-            self.root.after(500, self.poll_progress)
+        # Update status with percentage
+        if progress_value > 0:
+            self.status_var.set(f"Transcribing... {progress_value:.0f}%{segments_info}")
 
     def transcription_complete(self):
         self.progress.stop()
@@ -1453,7 +1783,7 @@ class TranscriptionApp:
         else:
             self.progress['value'] = 100
             self.status_var.set(f"Complete — Transcribed {len(self.file_queue)} file(s)")
-            self.file_queue = []
+            self.file_queue = {}
 
         self.update_file_list()
         self.is_processing = False
@@ -6,34 +6,37 @@ Transcribes all video and audio files in the current directory to text files.
 
 import os
 import sys
+import argparse
 from pathlib import Path
 from faster_whisper import WhisperModel
-from tqdm import tqdm
 
 # Configuration
 MODEL_SIZE = "medium"  # Options: tiny, base, small, medium, large-v2, large-v3
 DEVICE = "auto"  # Options: auto, cpu, cuda
 COMPUTE_TYPE = "auto"  # Options: auto, int8, float16, float32
-MEDIA_EXTENSIONS = [
+# Lowercase only; compare against the lowercased suffix
+MEDIA_EXTENSIONS = frozenset({
     # Video formats
-    ".mp4", ".mov", ".avi", ".mkv", ".webm", ".MP4", ".MOV",
+    ".mp4", ".mov", ".avi", ".mkv", ".webm",
     # Audio formats
-    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus",
-    ".MP3", ".WAV", ".M4A", ".FLAC", ".OGG"
-]
+    ".mp3", ".wav", ".m4a", ".flac", ".ogg", ".aac", ".wma", ".opus"
+})
 OUTPUT_DIR = "transcripts"
+# Print the running segment count every this many segments
+PROGRESS_EVERY = 20
 
 
 def get_media_files(directory="."):
-    """Find all video and audio files in the directory"""
-    media_files = []
-    for ext in MEDIA_EXTENSIONS:
-        media_files.extend(Path(directory).glob(f"*{ext}"))
-    return sorted(media_files)
+    """Find all video and audio files in the directory (extensions match in any case)"""
+    # One directory pass; DirEntry.is_file() reuses the type scandir already read
+    with os.scandir(directory) as entries:
+        return sorted(Path(entry.path) for entry in entries
+                      if os.path.splitext(entry.name)[1].lower() in MEDIA_EXTENSIONS
+                      and entry.is_file())
 
 
-def transcribe_media(model, media_path, output_dir):
-    """Transcribe a single video or audio file"""
+def transcribe_media(model, media_path, output_dir, force=False, beam_size=1):
+    """Transcribe a single video or audio file, skipping it if its transcript exists unless force is set"""
     print(f"\n{'='*80}")
     print(f"Transcribing: {media_path.name}")
     print(f"{'='*80}")
@@ -42,19 +45,17 @@ def transcribe_media(model, media_path, output_dir):
     output_file = Path(output_dir) / f"{media_path.stem}.txt"
 
     # Skip if already transcribed
-    if output_file.exists():
-        print(f"⚠️  Transcript already exists: {output_file.name}")
-        user_input = input("Do you want to re-transcribe? (y/N): ")
-        if user_input.lower() != 'y':
-            print("Skipping...")
-            return
+    if output_file.exists() and not force:
+        print(f"⚠️  Transcript already exists: {output_file.name} (use --force to re-transcribe)")
+        print("Skipping...")
+        return
 
     try:
         # Transcribe
         segments, info = model.transcribe(
             str(media_path),
             language=None,  # Auto-detect language
-            beam_size=5,
+            beam_size=beam_size,
             vad_filter=True,  # Voice activity detection
             vad_parameters=dict(min_silence_duration_ms=500),
         )
@@ -71,9 +72,13 @@ def transcribe_media(model, media_path, output_dir):
             f.write(f"{'-'*80}\n\n")
 
             # Write segments with timestamps
-            for segment in tqdm(segments, desc="Processing segments"):
+            count = 0
+            for count, segment in enumerate(segments, 1):
                 timestamp = f"[{format_timestamp(segment.start)} --> {format_timestamp(segment.end)}]"
                 f.write(f"{timestamp}\n{segment.text.strip()}\n\n")
+                if count % PROGRESS_EVERY == 0:
+                    print(f"\r  Segments: {count}", end='', flush=True)
+            print(f"\r  Segments: {count}")
 
         print(f"✅ Saved transcript to: {output_file}")
 
@@ -91,6 +96,15 @@ def format_timestamp(seconds):
 
 def main():
     """Main function"""
+    parser = argparse.ArgumentParser(description="Transcribe all media files in the current directory")
+    parser.add_argument("--force", action="store_true",
+                        help="re-transcribe files that already have a transcript")
+    parser.add_argument("--beam-size", type=int, default=1,
+                        help="beam width; 1 (greedy) is several times faster, 5 is slightly more accurate")
+    parser.add_argument("-y", "--yes", action="store_true",
+                        help="start without asking for confirmation (for unattended runs)")
+    args = parser.parse_args()
+
     print("🎙️  Audio/Video Transcription Script (Faster Whisper)")
     print(f"Model: {MODEL_SIZE}")
     print(f"Device: {DEVICE}")
@@ -111,12 +125,22 @@ def main():
         size_mb = media.stat().st_size / (1024 * 1024)
         print(f"  {i}. {media.name} ({size_mb:.1f} MB)")
 
+    # Only files without a transcript need the model (unless --force)
+    pending = [media for media in media_files
+               if args.force or not (Path(OUTPUT_DIR) / f"{media.stem}.txt").exists()]
+    if len(pending) < len(media_files):
+        print(f"\n{len(media_files) - len(pending)} file(s) already transcribed, skipping (use --force to redo)")
+    if not pending:
+        print("Nothing to do.")
+        return
+
     # Ask for confirmation
     print(f"\nTranscripts will be saved to: {OUTPUT_DIR}/")
-    user_input = input("\nProceed with transcription? (Y/n): ")
-    if user_input.lower() == 'n':
-        print("Cancelled.")
-        sys.exit(0)
+    if not args.yes:
+        user_input = input("\nProceed with transcription? (Y/n): ")
+        if user_input.lower() == 'n':
+            print("Cancelled.")
+            sys.exit(0)
 
     # Load model
     print(f"\n⏳ Loading Whisper model '{MODEL_SIZE}'...")
@@ -130,9 +154,9 @@ def main():
         sys.exit(1)
 
     # Transcribe each media file
-    for i, media_path in enumerate(media_files, 1):
-        print(f"\n\n[{i}/{len(media_files)}]")
-        transcribe_media(model, media_path, OUTPUT_DIR)
+    for i, media_path in enumerate(pending, 1):
+        print(f"\n\n[{i}/{len(pending)}]")
+        transcribe_media(model, media_path, OUTPUT_DIR, force=args.force, beam_size=args.beam_size)
 
     print("\n" + "="*80)
     print("🎉 All done! Transcripts saved to:", OUTPUT_DIR)